@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Add or refresh the search keys of existing orders for Tantawan Restaurant
+Orders created before the indexed admin search and the normalized phone
+key cannot be found by name or phone, nor in a customer's order history,
+until this has run once. Run it again whenever the phone normalization
+changes; orders whose keys are already current are skipped.
+
+Usage:
+    python backfill_search.py
+"""
+
+import asyncio
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+from services.order_search import backfill_search_keys
+
+
+async def backfill():
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        updated = await backfill_search_keys(db)
+        print(f"✅ Updated search keys of {updated} orders")
+    except Exception as e:
+        print(f"❌ Error adding search keys: {e}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from pathlib import Path
+
+    # Load environment variables
+    ROOT_DIR = Path(__file__).parent
+    load_dotenv(ROOT_DIR / '.env')
+
+    asyncio.run(backfill())
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Query plan check for Tantawan Restaurant
+Runs every query shape of the API through explain and fails if one of them
+has to scan a whole collection (MongoDB) or table (SQL).
+
+Usage:
+    python check_query_plans.py mongo   # routes/ and services/ against MONGO_URL / DB_NAME
+    python check_query_plans.py sql     # server_sql_working.py against DATABASE_URL
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+def _today_range():
+    today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return today_start, today_start + timedelta(days=1)
+
+
+# === MONGODB ===
+def mongo_query_shapes():
+    """(description, collection, filter, sort) for every find of the API, the
+    archiver and the notification worker, built with the helpers they use"""
+    from models import ACTIVE_ORDER_STATUSES
+    from services.order_search import search_query
+    from services.pagination import with_keyset, keyset_sort, encode_cursor
+    from services.order_archive import ARCHIVE_COLLECTION, archivable_filter, archive_cutoff
+    from services.order_stats import ACTIVE_COUNTER_ID, stats_day
+    from services.notification_outbox import OUTBOX_COLLECTION, claimable_filter
+
+    today_start, today_end = _today_range()
+    today = datetime.utcnow().strftime("%Y%m%d")
+    newest_first = keyset_sort("created_at")
+    cursor = encode_cursor(today_start, "check")
+    today_range = {"created_at": {"$gte": today_start, "$lt": today_end}}
+    phone = {"phone_key": "+41791234567"}
+
+    # find_order / find_orders(..., include_archive=True) run these on both collections
+    order_reads = [
+        ("by id", {"id": "check"}, None),
+        ("by number", {"order_number": f"TW-{today}-0001"}, None),
+        ("list", {}, newest_first),
+        ("list, next page", with_keyset({}, "created_at", cursor), newest_first),
+        ("list by status", {"status": "pending"}, newest_first),
+        ("list by status, next page", with_keyset({"status": "pending"}, "created_at", cursor), newest_first),
+        ("date range", today_range, newest_first),
+        ("date range by status", {"status": "completed", **today_range}, newest_first),
+        ("export", today_range, [("created_at", 1), ("id", 1)]),
+        ("customer history", phone, newest_first),
+        ("customer history, next page", with_keyset(phone, "created_at", cursor), newest_first),
+        ("search", search_query("müller 079 123"), [("created_at", -1)]),
+    ]
+
+    shapes = [
+        ("menu: available items", "menu_items", {"available": True}, None),
+        ("menu: category listing", "menu_items", {"category": "Vorspeisen", "available": True}, None),
+        ("menu: single item", "menu_items", {"id": "check"}, None),
+    ]
+    for description, query, sort in order_reads:
+        shapes.append((f"orders: {description}", "orders", query, sort))
+        shapes.append((f"orders_archive: {description}", ARCHIVE_COLLECTION, query, sort))
+
+    return shapes + [
+        ("orders: today's number prefix", "orders", {"order_number": {"$regex": f"^TW-{today}-"}}, None),
+        ("orders: kitchen queue", "orders",
+         {"status": {"$in": [status.value for status in ACTIVE_ORDER_STATUSES]}}, [("created_at", 1)]),
+        ("orders: batch status read", "orders", {"id": {"$in": ["check-1", "check-2"]}}, None),
+        ("orders: archiver batch", "orders", archivable_filter(archive_cutoff()), [("created_at", 1)]),
+        ("daily_stats: dashboard", "daily_stats",
+         {"_id": {"$in": [stats_day(today_start), ACTIVE_COUNTER_ID]}}, None),
+        ("daily_stats: analytics range", "daily_stats",
+         {"_id": {"$gte": stats_day(today_start - timedelta(days=30)), "$lt": stats_day(today_end)}},
+         [("_id", 1)]),
+        ("notification_outbox: claim", OUTBOX_COLLECTION,
+         claimable_filter(datetime.utcnow()), [("next_attempt_at", 1)]),
+        ("newsletter: by email", "newsletter_subscriptions", {"email": "check@example.com"}, None),
+        ("newsletter: active list", "newsletter_subscriptions",
+         {"is_active": True}, keyset_sort("subscribed_at")),
+        ("newsletter: full list", "newsletter_subscriptions", {}, keyset_sort("subscribed_at")),
+    ]
+
+
+def mongo_aggregate_shapes():
+    """(description, collection, pipeline) for counts and aggregations"""
+    count = {"$group": {"_id": None, "n": {"$sum": 1}}}
+
+    # Order statistics are read from the daily_stats rollups, see mongo_query_shapes
+    return [
+        ("newsletter: active count", "newsletter_subscriptions", [{"$match": {"is_active": True}}, count]),
+    ]
+
+
+def _winning_plans(explain):
+    """Yield every winningPlan in an explain document (find or aggregate)"""
+    if isinstance(explain, dict):
+        for key, value in explain.items():
+            if key == "winningPlan":
+                yield value
+            elif key != "rejectedPlans":
+                yield from _winning_plans(value)
+    elif isinstance(explain, list):
+        for value in explain:
+            yield from _winning_plans(value)
+
+
+def _has_collscan(plan):
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(_has_collscan(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_has_collscan(value) for value in plan)
+    return False
+
+
+async def check_mongo():
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from database import INDEX_PLAN
+
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    database = client[os.environ["DB_NAME"]]
+
+    # Make sure the plan is in place before asking the planner about it
+    for collection, indexes in INDEX_PLAN.items():
+        for keys, options in indexes:
+            await database[collection].create_index(keys, **options)
+
+    failures = []
+    try:
+        for description, collection, query, sort in mongo_query_shapes():
+            cursor = database[collection].find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            explain = await cursor.explain()
+            if any(_has_collscan(plan) for plan in _winning_plans(explain)):
+                failures.append(description)
+
+        for description, collection, pipeline in mongo_aggregate_shapes():
+            explain = await database.command(
+                "explain",
+                {"aggregate": collection, "pipeline": pipeline, "cursor": {}},
+                verbosity="queryPlanner"
+            )
+            if any(_has_collscan(plan) for plan in _winning_plans(explain)):
+                failures.append(description)
+    finally:
+        client.close()
+
+    return failures
+
+
+# === SQL ===
+def sql_query_shapes():
+    """(description, statement) for every query in server_sql_working.py,
+    taken from the same builders the endpoints call"""
+    import server_sql_working as sql
+
+    today_start, today_end = _today_range()
+    today = datetime.utcnow().strftime("%Y%m%d")
+
+    return [
+        ("menu: available items", sql.menu_items_query()),
+        ("menu: category listing", sql.menu_items_query("Vorspeisen")),
+        ("orders: counter row", sql.COUNTER_INCREMENT.bindparams(day=today)),
+        ("orders: first number of the day",
+         sql.COUNTER_START.bindparams(day=today, pattern=f"TW-{today}-%")),
+        ("orders: kitchen queue", sql.active_orders_query()),
+        ("orders: today", sql.orders_created_between_query(today_start, today_end)),
+        ("orders: line items", sql.order_items_query(["check-1", "check-2"])),
+        ("orders: status update", sql.order_status_update("check", "confirmed", ["pending"])),
+        ("orders: current status", sql.order_status_query("check")),
+        ("stats: today and pending", sql.order_stats_query(today_start, today_end)),
+        ("newsletter: by email", sql.subscription_query("check@example.com")),
+        ("newsletter: active count", sql.active_subscriptions_count_query()),
+    ]
+
+
+def _sql_plan_scans(connection, statement):
+    # Parameters are inlined so the plan is explained as the database would run it
+    compiled = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + compiled).fetchall()
+        details = [row[-1] for row in rows]
+        return any(
+            detail.startswith("SCAN ") and "USING" not in detail and "CONSTANT ROW" not in detail
+            for detail in details
+        )
+
+    rows = connection.exec_driver_sql("EXPLAIN " + compiled).fetchall()
+    return any("Seq Scan" in row[0] for row in rows)
+
+
+async def check_sql():
+    from sqlalchemy import text
+    from server_sql_working import engine, Base, create_missing_indexes
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_missing_indexes)
+
+    failures = []
+    async with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            # Small tables are cheaper to scan; we want to know whether an index *could* be used
+            await conn.execute(text("SET enable_seqscan = off"))
+
+        for description, statement in sql_query_shapes():
+            scans = await conn.run_sync(_sql_plan_scans, statement)
+            if scans:
+                failures.append(description)
+
+    await engine.dispose()
+    return failures
+
+
+async def main(backend):
+    if backend == "mongo":
+        failures = await check_mongo()
+    elif backend == "sql":
+        failures = await check_sql()
+    else:
+        print(__doc__)
+        return 2
+
+    if failures:
+        print("❌ Query shapes without a usable index:")
+        for description in failures:
+            print(f"   - {description}")
+        return 1
+
+    print("✅ Every query shape uses an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "")))
@@ -1,4 +1,6 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, monitoring
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime
 import os
 
@@ -11,13 +13,91 @@ class Database:
 db = Database()
 
 
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Live connection pool counters, fed by pymongo's CMAP events"""
+
+    def __init__(self):
+        self.checked_out = 0
+        self.waiting = 0
+        self.created = 0
+        self.closed = 0
+        self.timed_out = 0
+
+    def as_dict(self):
+        return {
+            "checked_out": self.checked_out,
+            "waiting": self.waiting,
+            "created": self.created,
+            "closed": self.closed,
+            "timed_out": self.timed_out,
+            "open": self.created - self.closed,
+        }
+
+    def connection_check_out_started(self, event):
+        self.waiting += 1
+
+    def connection_checked_out(self, event):
+        self.waiting -= 1
+        self.checked_out += 1
+
+    def connection_check_out_failed(self, event):
+        self.waiting -= 1
+        if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+            self.timed_out += 1
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    def connection_created(self, event):
+        self.created += 1
+
+    def connection_closed(self, event):
+        self.closed += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+
+pool_stats = PoolStats()
+
+
+def mongo_pool_options():
+    """Connection pool settings, overridable from the environment"""
+    return {
+        "maxPoolSize": int(os.environ.get("MONGO_MAX_POOL_SIZE", "100")),
+        "minPoolSize": int(os.environ.get("MONGO_MIN_POOL_SIZE", "0")),
+        # Recycle idle connections before firewalls/load balancers drop them
+        "maxIdleTimeMS": int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", "300000")),
+        # Fail fast instead of queueing forever when the pool is exhausted
+        "waitQueueTimeoutMS": int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000")),
+        "connectTimeoutMS": int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", "10000")),
+        "serverSelectionTimeoutMS": int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000")),
+    }
+
+
 async def get_database():
     return db.database
 
 
 async def connect_to_mongo():
     """Create database connection"""
-    db.client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    db.client = AsyncIOMotorClient(
+        os.environ["MONGO_URL"],
+        event_listeners=[pool_stats],
+        **mongo_pool_options()
+    )
     db.database = db.client[os.environ["DB_NAME"]]
     
     # Create indexes for better performance
@@ -29,37 +109,100 @@ async def close_mongo_connection():
     db.client.close()
 
 
+# Index plan: every query shape in routes/*.py is served by one of these,
+# check_query_plans.py verifies that none of them scans a collection
+INDEX_PLAN = {
+    "menu_items": [
+        # Snapshot load, category listing, single item lookup
+        ([("available", 1)], {}),
+        ([("category", 1), ("available", 1)], {}),
+        ([("id", 1)], {}),
+    ],
+    "orders": [
+        ([("id", 1)], {}),
+        # Unique order numbers, also serves the TW-YYYYMMDD- prefix count
+        ([("order_number", 1)], {"unique": True}),
+        # Lists, keyset pagination, today / date range and stats matches
+        ([("created_at", -1), ("id", -1)], {}),
+        # Status filter with created_at sort, kitchen queue, pending counts
+        ([("status", 1), ("created_at", -1), ("id", -1)], {}),
+        # Customer history by normalized phone, newest first with keyset pagination
+        ([("phone_key", 1), ("created_at", -1), ("id", -1)], {}),
+        # Admin search: name token, E.164 phone and phone suffix prefixes
+        ([("search.name_tokens", 1)], {}),
+        ([("search.phone", 1)], {}),
+        ([("search.phone_rev", 1)], {}),
+    ],
+    # Finished orders moved out of the hot collection by services/order_archive.py
+    "orders_archive": [
+        ([("id", 1)], {}),
+        ([("order_number", 1)], {"unique": True}),
+        ([("created_at", -1), ("id", -1)], {}),
+        ([("status", 1), ("created_at", -1), ("id", -1)], {}),
+        # Order lookups, customer history and admin search read the archive too
+        ([("phone_key", 1), ("created_at", -1), ("id", -1)], {}),
+        ([("search.name_tokens", 1)], {}),
+        ([("search.phone", 1)], {}),
+        ([("search.phone_rev", 1)], {}),
+    ],
+    # Email / printer notifications waiting for notification_worker.py
+    "notification_outbox": [
+        ([("status", 1), ("next_attempt_at", 1)], {}),
+        ([("status", 1), ("locked_until", 1)], {}),
+        # Delivered entries are kept for a week for troubleshooting
+        ([("sent_at", 1)], {"expireAfterSeconds": 7 * 24 * 3600}),
+    ],
+    "newsletter_subscriptions": [
+        ([("email", 1)], {"unique": True}),
+        # Active count and active listing with keyset pagination
+        ([("is_active", 1), ("subscribed_at", -1), ("id", -1)], {}),
+        ([("subscribed_at", -1), ("id", -1)], {}),
+    ],
+}
+
+
 async def create_indexes():
     """Create database indexes for optimal performance"""
     try:
-        # Menu items indexes
-        await db.database.menu_items.create_index("category")
-        await db.database.menu_items.create_index("available")
-        
-        # Orders indexes
-        await db.database.orders.create_index("status")
-        await db.database.orders.create_index("created_at")
-        await db.database.orders.create_index("order_number", unique=True)
-        await db.database.orders.create_index("customer.phone")
-        
-        # Newsletter subscriptions indexes
-        await db.database.newsletter_subscriptions.create_index("email", unique=True)
-        await db.database.newsletter_subscriptions.create_index("is_active")
+        for collection, indexes in INDEX_PLAN.items():
+            for keys, options in indexes:
+                await db.database[collection].create_index(keys, **options)
         
         print("✅ Database indexes created successfully")
     except Exception as e:
         print(f"⚠️ Warning: Could not create indexes: {e}")
 
 
+async def _next_order_sequence(today: str) -> int:
+    """Atomically increment today's counter, None if it does not exist yet"""
+    counter = await db.database.order_counters.find_one_and_update(
+        {"_id": today},
+        {"$inc": {"seq": 1}},
+        return_document=ReturnDocument.AFTER
+    )
+    return counter["seq"] if counter else None
+
+
 async def generate_order_number():
     """Generate unique order number in format TW-YYYYMMDD-XXXX"""
     today = datetime.utcnow().strftime("%Y%m%d")
     
-    # Count today's orders
-    count = await db.database.orders.count_documents({
-        "order_number": {"$regex": f"^TW-{today}-"}
-    })
+    next_number = await _next_order_sequence(today)
+    if next_number is None:
+        # First order of the day: start the counter after any numbers that
+        # were issued before it existed (uses the order_number index once)
+        existing = await db.database.orders.count_documents({
+            "order_number": {"$regex": f"^TW-{today}-"}
+        })
+        try:
+            await db.database.order_counters.update_one(
+                {"_id": today},
+                {"$max": {"seq": existing}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Another request created the counter at the same time
+            pass
+        next_number = await _next_order_sequence(today)
     
-    # Generate next number
-    next_number = count + 1
-    return f"TW-{today}-{next_number:04d}"
\ No newline at end of file
+    return f"TW-{today}-{next_number:04d}"
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, String, Float, DateTime, Boolean, Text, Integer, ForeignKey
+from sqlalchemy import create_engine, Column, String, Float, DateTime, Boolean, Text, Integer, ForeignKey, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session, relationship
 from datetime import datetime
@@ -6,6 +6,7 @@ import os
 import uuid
 from pathlib import Path
 from dotenv import load_dotenv
+from sql_pool import sql_pool_options
 
 # Load environment variables properly
 ROOT_DIR = Path(__file__).parent
@@ -23,7 +24,7 @@ if not DATABASE_URL:
 print(f"✅ Using database: {DATABASE_URL}")
 
 try:
-    engine = create_engine(DATABASE_URL, echo=True)  # echo=True for debugging
+    engine = create_engine(DATABASE_URL, echo=True, **sql_pool_options(DATABASE_URL))  # echo=True for debugging
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 except Exception as e:
     print(f"❌ Database connection failed: {e}")
@@ -38,6 +39,10 @@ Base = declarative_base()
 # Database Models
 class MenuItemDB(Base):
     __tablename__ = "menu_items"
+    __table_args__ = (
+        # Serves both the available-only and the category listing
+        Index("ix_menu_items_available_category", "available", "category"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     category = Column(String, nullable=False)
@@ -51,6 +56,12 @@ class MenuItemDB(Base):
 
 class OrderDB(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Kitchen queue and pending counts: status IN (...) ORDER BY created_at
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        # Today's orders and stats: created_at range
+        Index("ix_orders_created_at", "created_at"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     order_number = Column(String, unique=True, nullable=False)
@@ -70,7 +81,7 @@ class OrderItemDB(Base):
     __tablename__ = "order_items"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    order_id = Column(String, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(String, ForeignKey("orders.id"), nullable=False, index=True)
     menu_item_id = Column(String, nullable=False)
     name = Column(String, nullable=False)
     price = Column(Float, nullable=False)
@@ -79,12 +90,18 @@ class OrderItemDB(Base):
     # Relationship
     order = relationship("OrderDB", back_populates="items")
 
+class OrderCounterDB(Base):
+    __tablename__ = "order_counters"
+    
+    day = Column(String, primary_key=True)
+    last_value = Column(Integer, nullable=False, default=0)
+
 class NewsletterDB(Base):
     __tablename__ = "newsletter_subscriptions"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     email = Column(String, unique=True, nullable=False)
-    is_active = Column(Boolean, default=True)
+    is_active = Column(Boolean, default=True, index=True)
     subscribed_at = Column(DateTime, default=datetime.utcnow)
     unsubscribed_at = Column(DateTime, nullable=True)
 
@@ -96,28 +113,57 @@ def get_db():
     finally:
         db.close()
 
+def create_missing_indexes(connection):
+    """create_all() skips tables that already exist, so add new indexes explicitly"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
 def create_tables():
     """Create all tables"""
     try:
         Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            create_missing_indexes(connection)
         print("✅ Database tables created successfully")
     except Exception as e:
         print(f"❌ Error creating tables: {e}")
         raise
 
-def generate_order_number():
-    """Generate unique order number"""
+def next_order_number(db: Session) -> str:
+    """Issue the next order number from the per-day counter row.
+    
+    Runs inside the caller's transaction; the counter row stays locked until
+    it commits, so concurrent orders can never get the same number.
+    """
     today = datetime.utcnow().strftime("%Y%m%d")
     
-    # Count today's orders
-    db = SessionLocal()
-    count = db.query(OrderDB).filter(OrderDB.order_number.like(f"TW-{today}-%")).count()
-    db.close()
+    next_number = db.execute(text(
+        "UPDATE order_counters SET last_value = last_value + 1 "
+        "WHERE day = :day RETURNING last_value"
+    ), {"day": today}).scalar()
+    
+    if next_number is None:
+        # First order of the day: start after numbers issued before the counter existed
+        next_number = db.execute(text(
+            "INSERT INTO order_counters (day, last_value) "
+            "SELECT :day, COUNT(*) + 1 FROM orders WHERE order_number LIKE :pattern "
+            "ON CONFLICT (day) DO UPDATE SET last_value = order_counters.last_value + 1 "
+            "RETURNING last_value"
+        ), {"day": today, "pattern": f"TW-{today}-%"}).scalar()
     
-    # Generate next number
-    next_number = count + 1
     return f"TW-{today}-{next_number:04d}"
 
+def generate_order_number():
+    """Generate unique order number"""
+    db = SessionLocal()
+    try:
+        order_number = next_order_number(db)
+        db.commit()
+        return order_number
+    finally:
+        db.close()
+
 # Test database connection
 if __name__ == "__main__":
     try:
@@ -14,6 +14,27 @@ class OrderStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+# Active orders are still being worked on by the kitchen
+ACTIVE_ORDER_STATUSES = [OrderStatus.PENDING, OrderStatus.CONFIRMED, OrderStatus.PREPARING]
+
+# Kitchen workflow order; an order may only move forward along it
+ORDER_STATUS_FLOW = [
+    OrderStatus.PENDING,
+    OrderStatus.CONFIRMED,
+    OrderStatus.PREPARING,
+    OrderStatus.READY,
+    OrderStatus.COMPLETED,
+]
+
+
+def allowed_previous_statuses(new_status: OrderStatus) -> List[OrderStatus]:
+    """Statuses an order may be in for a change to new_status to be allowed"""
+    if new_status == OrderStatus.CANCELLED:
+        # Anything not yet handed over can be cancelled
+        return ORDER_STATUS_FLOW[:-1]
+    return ORDER_STATUS_FLOW[:ORDER_STATUS_FLOW.index(new_status)]
+
+
 class Category(str, Enum):
     VORSPEISEN = "Vorspeisen"
     HAUPTGERICHTE = "Hauptgerichte"
@@ -121,6 +142,34 @@ class OrderStatusUpdate(BaseModel):
     status: OrderStatus
 
 
+class OrderStatusBatchItem(BaseModel):
+    order_id: str
+    status: OrderStatus
+
+
+class OrderStatusBatchUpdate(BaseModel):
+    updates: List[OrderStatusBatchItem]
+
+    @validator('updates')
+    def validate_updates(cls, v):
+        if not v:
+            raise ValueError('Batch must contain at least one update')
+        if len(v) > 100:
+            raise ValueError('Batch may contain at most 100 updates')
+        order_ids = [update.order_id for update in v]
+        if len(set(order_ids)) != len(order_ids):
+            raise ValueError('Each order may appear only once per batch')
+        return v
+
+
+class OrderStatusBatchResult(BaseModel):
+    order_id: str
+    status: OrderStatus
+    success: bool
+    error: Optional[str] = None
+    order: Optional[Order] = None
+
+
 # Newsletter Models
 class NewsletterSubscription(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
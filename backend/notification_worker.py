@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Notification worker for Tantawan Restaurant
+Delivers the email and printer notifications that order creation writes to
+the notification_outbox collection. Run it as its own process next to the
+API; several instances may run at once.
+
+Usage:
+    python notification_worker.py
+"""
+
+import asyncio
+import logging
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+ROOT_DIR = Path(__file__).parent
+# Before importing the services: the email service reads SMTP_* when it is created
+load_dotenv(ROOT_DIR / '.env')
+
+from services.notification_outbox import NotificationWorker
+
+
+async def main():
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        await NotificationWorker(db).run()
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    asyncio.run(main())
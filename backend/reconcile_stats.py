@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Rebuild the daily_stats rollup for Tantawan Restaurant
+Recomputes the per-day order counts from the orders collection and resets
+the active-order counter. Days are local days in STATS_TIMEZONE (default
+Europe/Zurich). Run it after restoring data, after changing the timezone
+or whenever the dashboard numbers drift from the orders themselves.
+
+Usage:
+    python reconcile_stats.py                          # the last 7 days
+    python reconcile_stats.py 2024-01-01               # from a day up to today
+    python reconcile_stats.py 2024-01-01 2024-02-01    # [from, to)
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorClient
+from services.order_stats import rebuild_daily_stats
+
+
+async def reconcile(date_from: datetime, date_to=None):
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        days = await rebuild_daily_stats(db, date_from, date_to)
+        print(f"✅ Rebuilt daily stats for {days} days with orders")
+    except Exception as e:
+        print(f"❌ Error rebuilding daily stats: {e}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from pathlib import Path
+
+    # Load environment variables
+    ROOT_DIR = Path(__file__).parent
+    load_dotenv(ROOT_DIR / '.env')
+
+    args = sys.argv[1:]
+    date_from = datetime.fromisoformat(args[0]) if args else datetime.utcnow() - timedelta(days=7)
+    date_to = datetime.fromisoformat(args[1]) if len(args) > 1 else None
+
+    asyncio.run(reconcile(date_from, date_to))
@@ -1,12 +1,34 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import Response, StreamingResponse
 from typing import List, Optional
 from datetime import datetime, timedelta
-from models import Order, OrderStatus, OrderStatusUpdate
+from models import Order, OrderStatus, OrderStatusUpdate, OrderStatusBatchUpdate, OrderStatusBatchResult
 from database import get_database
+from services.order_status import change_order_status, change_order_statuses, StatusTransitionError
+from services.pagination import with_keyset, keyset_sort, set_next_cursor
+from services.serialization import ORDER_PROJECTION, order_document, orders_response
+from services.order_export import export_ndjson, export_csv
+from services.order_stats import get_daily_stats, record_order_deleted, local_now, stats_day
+from services.order_events import order_events
+from services.order_search import search_query
+from services.order_archive import find_orders, reaches_archive
+from services.dashboard import dashboard_cache, build_dashboard, find_pending_orders, find_todays_orders
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
+def _date_range_filter(date_from: Optional[str], date_to: Optional[str]) -> dict:
+    """created_at filter for an inclusive YYYY-MM-DD date range"""
+    date_filter = {}
+    if date_from:
+        date_filter["$gte"] = datetime.fromisoformat(date_from)
+    if date_to:
+        # Add one day to include the entire end date
+        end_date = datetime.fromisoformat(date_to) + timedelta(days=1)
+        date_filter["$lt"] = end_date
+    return date_filter
+
+
 @router.get("/orders", response_model=List[Order])
 async def get_all_orders(
     status: Optional[OrderStatus] = None,
@@ -14,6 +36,7 @@ async def get_all_orders(
     date_to: Optional[str] = Query(None, description="Date to (YYYY-MM-DD)"),
     limit: int = Query(50, ge=1, le=200),
     skip: int = Query(0, ge=0),
+    after: Optional[str] = Query(None, alias="cursor", description="Cursor from X-Next-Cursor"),
     db=Depends(get_database)
 ):
     """Get all orders with filtering options for admin dashboard"""
@@ -26,42 +49,79 @@ async def get_all_orders(
         
         # Filter by date range
         if date_from or date_to:
-            date_filter = {}
-            if date_from:
-                date_filter["$gte"] = datetime.fromisoformat(date_from)
-            if date_to:
-                # Add one day to include the entire end date
-                end_date = datetime.fromisoformat(date_to) + timedelta(days=1)
-                date_filter["$lt"] = end_date
-            query["created_at"] = date_filter
-        
-        cursor = db.orders.find(query).sort("created_at", -1).skip(skip).limit(limit)
-        orders = []
-        async for order in cursor:
-            # Convert MongoDB _id to id
-            order["id"] = str(order.pop("_id", order.get("id")))
-            orders.append(Order(**order))
-        
-        return orders
+            query["created_at"] = _date_range_filter(date_from, date_to)
+        
+        # Finished orders past the archive age live in orders_archive
+        include_archive = reaches_archive(query.get("created_at", {}).get("$gte"))
+        query = with_keyset(query, "created_at", after)
+        
+        docs = await find_orders(
+            db, query, ORDER_PROJECTION, keyset_sort("created_at"), limit, skip, include_archive
+        )
+        orders = [order_document(order) for order in docs]
+        last_key = (docs[-1]["created_at"], docs[-1].get("id")) if docs else None
+        
+        response = orders_response(orders)
+        set_next_cursor(response, last_key, len(orders), limit)
+        return response
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch orders: {str(e)}")
 
 
+@router.get("/orders/export")
+async def export_orders(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    date_from: Optional[str] = Query(None, description="Date from (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Date to (YYYY-MM-DD)"),
+    per_item: bool = Query(False, description="One row per line item instead of per order"),
+    db=Depends(get_database)
+):
+    """Stream orders for accounting straight from the database cursor"""
+    try:
+        query = {}
+        if date_from or date_to:
+            query["created_at"] = _date_range_filter(date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    include_archive = reaches_archive(query.get("created_at", {}).get("$gte"))
+    if format == "csv":
+        body, media_type = export_csv(db, query, per_item, include_archive), "text/csv; charset=utf-8"
+    else:
+        body, media_type = export_ndjson(db, query, per_item, include_archive), "application/x-ndjson"
+    
+    filename = f"orders_{date_from or 'start'}_{date_to or 'today'}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/orders/stream")
+async def stream_orders():
+    """Push order-created, status-changed and deleted events as Server-Sent Events"""
+    return StreamingResponse(
+        order_events.stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Keep nginx from buffering the event stream
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @router.get("/orders/pending", response_model=List[Order])
 async def get_pending_orders(db=Depends(get_database)):
     """Get all pending orders for kitchen display"""
     try:
-        cursor = db.orders.find({
-            "status": {"$in": ["pending", "confirmed", "preparing"]}
-        }).sort("created_at", 1)  # Oldest first for kitchen
+        orders = await find_pending_orders(db)
         
-        orders = []
-        async for order in cursor:
-            order["id"] = str(order.pop("_id", order.get("id")))
-            orders.append(Order(**order))
-        
-        return orders
+        return orders_response(orders)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch pending orders: {str(e)}")
@@ -71,25 +131,29 @@ async def get_pending_orders(db=Depends(get_database)):
 async def get_todays_orders(db=Depends(get_database)):
     """Get today's orders"""
     try:
-        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_end = today_start + timedelta(days=1)
+        orders = await find_todays_orders(db, local_now())
         
-        cursor = db.orders.find({
-            "created_at": {
-                "$gte": today_start,
-                "$lt": today_end
-            }
-        }).sort("created_at", -1)
+        return orders_response(orders)
         
-        orders = []
-        async for order in cursor:
-            order["id"] = str(order.pop("_id", order.get("id")))
-            orders.append(Order(**order))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch today's orders: {str(e)}")
+
+
+@router.get("/dashboard")
+async def get_dashboard(db=Depends(get_database)):
+    """Get today's orders, pending orders and stats in one response"""
+    try:
+        today = local_now()
         
-        return orders
+        # Concurrent requests from several terminals share one computation
+        body = await dashboard_cache.get(
+            stats_day(today), lambda: build_dashboard(db, today)
+        )
+        
+        return Response(content=body, media_type="application/json")
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch today's orders: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch dashboard: {str(e)}")
 
 
 @router.put("/orders/{order_id}/status", response_model=Order)
@@ -100,78 +164,45 @@ async def update_order_status_admin(
 ):
     """Update order status - enhanced for admin use"""
     try:
-        # Find the order first
-        order = await db.orders.find_one({"id": order_id})
-        if not order:
+        updated_order = await change_order_status(db, order_id, status_update.status)
+        if not updated_order:
             raise HTTPException(status_code=404, detail="Order not found")
         
-        # Update status and timestamp
-        update_data = {
-            "status": status_update.status.value,
-            "updated_at": datetime.utcnow()
-        }
-        
-        result = await db.orders.update_one(
-            {"id": order_id},
-            {"$set": update_data}
-        )
-        
-        if result.modified_count == 0:
-            raise HTTPException(status_code=400, detail="Failed to update order status")
-        
-        # Return updated order
-        updated_order = await db.orders.find_one({"id": order_id})
         updated_order["id"] = str(updated_order.pop("_id", updated_order.get("id")))
         return Order(**updated_order)
         
+    except StatusTransitionError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update order status: {str(e)}")
 
 
+@router.post("/orders/status:batch", response_model=List[OrderStatusBatchResult])
+async def update_order_statuses_batch(batch: OrderStatusBatchUpdate, db=Depends(get_database)):
+    """Update the status of several orders at once (kitchen display)"""
+    try:
+        results = await change_order_statuses(db, batch.updates)
+        
+        for result in results:
+            order = result.get("order")
+            if order:
+                order["id"] = str(order.pop("_id", order.get("id")))
+                result["order"] = Order(**order)
+        
+        return [OrderStatusBatchResult(**result) for result in results]
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update order statuses: {str(e)}")
+
+
 @router.get("/orders/stats")
 async def get_order_stats(db=Depends(get_database)):
     """Get order statistics for dashboard"""
     try:
-        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_end = today_start + timedelta(days=1)
-        
-        # Get today's stats
-        today_orders = await db.orders.count_documents({
-            "created_at": {"$gte": today_start, "$lt": today_end}
-        })
-        
-        # Get revenue today
-        pipeline = [
-            {"$match": {"created_at": {"$gte": today_start, "$lt": today_end}}},
-            {"$group": {"_id": None, "total_revenue": {"$sum": "$total"}}}
-        ]
-        revenue_result = await db.orders.aggregate(pipeline).to_list(1)
-        today_revenue = revenue_result[0]["total_revenue"] if revenue_result else 0
-        
-        # Get status counts
-        status_pipeline = [
-            {"$match": {"created_at": {"$gte": today_start, "$lt": today_end}}},
-            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
-        ]
-        status_results = await db.orders.aggregate(status_pipeline).to_list(10)
-        status_counts = {result["_id"]: result["count"] for result in status_results}
-        
-        # Get pending orders count
-        pending_count = await db.orders.count_documents({
-            "status": {"$in": ["pending", "confirmed", "preparing"]}
-        })
-        
-        return {
-            "today": {
-                "orders": today_orders,
-                "revenue": round(today_revenue, 2)
-            },
-            "status_counts": status_counts,
-            "pending_orders": pending_count,
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        # Maintained on every order write, see services/order_stats.py
+        return await get_daily_stats(db, local_now())
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch order stats: {str(e)}")
@@ -181,11 +212,17 @@ async def get_order_stats(db=Depends(get_database)):
 async def delete_order(order_id: str, db=Depends(get_database)):
     """Delete an order (admin only - use with caution)"""
     try:
-        result = await db.orders.delete_one({"id": order_id})
+        deleted = await db.orders.find_one_and_delete(
+            {"id": order_id},
+            {"_id": 1, "created_at": 1, "total": 1, "status": 1, "items": 1}
+        )
         
-        if result.deleted_count == 0:
+        if not deleted:
             raise HTTPException(status_code=404, detail="Order not found")
         
+        await record_order_deleted(db, deleted)
+        order_events.publish_deleted(str(deleted["_id"]))
+        
         return {"message": f"Order {order_id} deleted successfully"}
         
     except HTTPException:
@@ -194,7 +231,7 @@ async def delete_order(order_id: str, db=Depends(get_database)):
         raise HTTPException(status_code=500, detail=f"Failed to delete order: {str(e)}")
 
 
-@router.get("/orders/search")
+@router.get("/orders/search", response_model=List[Order])
 async def search_orders(
     q: str = Query(..., description="Search query (order number, customer name, or phone)"),
     limit: int = Query(20, ge=1, le=100),
@@ -202,22 +239,13 @@ async def search_orders(
 ):
     """Search orders by order number, customer name, or phone"""
     try:
-        # Create search query
-        search_query = {
-            "$or": [
-                {"order_number": {"$regex": q, "$options": "i"}},
-                {"customer.name": {"$regex": q, "$options": "i"}},
-                {"customer.phone": {"$regex": q, "$options": "i"}}
-            ]
-        }
-        
-        cursor = db.orders.find(search_query).sort("created_at", -1).limit(limit)
-        orders = []
-        async for order in cursor:
-            order["id"] = str(order.pop("_id", order.get("id")))
-            orders.append(Order(**order))
+        # Anchored prefixes on normalized, indexed keys (see services/order_search.py)
+        docs = await find_orders(
+            db, search_query(q), ORDER_PROJECTION, [("created_at", -1)], limit, include_archive=True
+        )
+        orders = [order_document(order) for order in docs]
         
-        return orders
+        return orders_response(orders)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to search orders: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,96 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional, Tuple
+from datetime import datetime, timedelta
+from database import get_database
+from services.order_stats import local_now
+from services.analytics import (
+    GRANULARITIES, TOP_ITEMS_METRICS, revenue_series, top_items, hour_of_week_heatmap
+)
+
+router = APIRouter(prefix="/admin/analytics", tags=["analytics"])
+
+# Reads go to the daily_stats rollups, one small document per day
+MAX_RANGE_DAYS = 366 * 3
+
+
+def _analytics_range(date_from: Optional[str], date_to: Optional[str]) -> Tuple[datetime, datetime]:
+    """[start, end) for an inclusive YYYY-MM-DD range, defaulting to the last 30 days"""
+    today = local_now().replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+    try:
+        end = datetime.fromisoformat(date_to) + timedelta(days=1) if date_to else today + timedelta(days=1)
+        start = datetime.fromisoformat(date_from) if date_from else end - timedelta(days=30)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+
+    if start >= end:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+    if (end - start).days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_RANGE_DAYS} days")
+    return start, end
+
+
+@router.get("/revenue")
+async def get_revenue(
+    date_from: Optional[str] = Query(None, description="Date from (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Date to (YYYY-MM-DD)"),
+    granularity: str = Query("day", description="day, week or month"),
+    db=Depends(get_database)
+):
+    """Get orders and revenue per day, week or month"""
+    try:
+        if granularity not in GRANULARITIES:
+            raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+        start, end = _analytics_range(date_from, date_to)
+        
+        return {
+            "granularity": granularity,
+            "series": await revenue_series(db, start, end, granularity)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch revenue analytics: {str(e)}")
+
+
+@router.get("/top-items")
+async def get_top_items(
+    date_from: Optional[str] = Query(None, description="Date from (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Date to (YYYY-MM-DD)"),
+    by: str = Query("quantity", description="quantity or revenue"),
+    limit: int = Query(10, ge=1, le=100),
+    db=Depends(get_database)
+):
+    """Get the best-selling menu items"""
+    try:
+        if by not in TOP_ITEMS_METRICS:
+            raise HTTPException(status_code=400, detail=f"by must be one of {', '.join(TOP_ITEMS_METRICS)}")
+        start, end = _analytics_range(date_from, date_to)
+        
+        return {
+            "by": by,
+            "items": await top_items(db, start, end, by, limit)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch top items: {str(e)}")
+
+
+@router.get("/heatmap")
+async def get_heatmap(
+    date_from: Optional[str] = Query(None, description="Date from (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Date to (YYYY-MM-DD)"),
+    db=Depends(get_database)
+):
+    """Get order volume by weekday and hour"""
+    try:
+        start, end = _analytics_range(date_from, date_to)
+        
+        return await hour_of_week_heatmap(db, start, end)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch order heatmap: {str(e)}")
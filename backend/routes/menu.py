@@ -1,42 +1,97 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from typing import List
 from models import MenuItem, MenuItemCreate, Category
 from database import get_database
+from services.menu_cache import menu_cache, make_etag, PreparedBody
 
 router = APIRouter(prefix="/menu", tags=["menu"])
 
 
+def _etag_matches(request: Request, *etags: str) -> bool:
+    """Weak comparison of If-None-Match against our ETags (RFC 7232)"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any((tag[2:] if tag.startswith("W/") else tag) in etags for tag in candidates)
+
+
+def _choose_encoding(request: Request, body: PreparedBody) -> str:
+    """Pick the best prepared content coding the client accepts"""
+    accepted = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    
+    for encoding in ("br", "gzip"):
+        if encoding in body.encodings and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return "identity"
+
+
+def _set_cache_headers(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    # Let browsers keep the menu but revalidate it on every page load
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def _not_modified(etag: str) -> Response:
+    response = Response(status_code=304)
+    _set_cache_headers(response, etag)
+    return response
+
+
+def _prepared_response(request: Request, body: PreparedBody) -> Response:
+    """Serve pre-encoded bytes without any per-request encoding work"""
+    encoding = _choose_encoding(request, body)
+    etag = body.etag(encoding)
+    
+    # Any coding of the same content is still fresh for the client
+    if _etag_matches(request, *(body.etag(name) for name in body.encodings)):
+        response = _not_modified(etag)
+    else:
+        response = Response(content=body.encodings[encoding], media_type="application/json")
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+        _set_cache_headers(response, etag)
+    
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
 @router.get("/", response_model=List[MenuItem])
-async def get_all_menu_items(db=Depends(get_database)):
+async def get_all_menu_items(request: Request, db=Depends(get_database)):
     """Get all menu items"""
     try:
-        cursor = db.menu_items.find({"available": True})
-        menu_items = []
-        async for item in cursor:
-            # Convert MongoDB _id to id
-            item["id"] = str(item.pop("_id", item.get("id")))
-            menu_items.append(MenuItem(**item))
-        
-        return menu_items
+        snapshot = await menu_cache.get_snapshot(db)
+        return _prepared_response(request, snapshot.body)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch menu items: {str(e)}")
 
 
 @router.get("/{category}", response_model=List[MenuItem])
-async def get_menu_items_by_category(category: Category, db=Depends(get_database)):
+async def get_menu_items_by_category(category: Category, request: Request, db=Depends(get_database)):
     """Get menu items by category"""
     try:
-        cursor = db.menu_items.find({"category": category.value, "available": True})
-        menu_items = []
-        async for item in cursor:
-            # Convert MongoDB _id to id
-            item["id"] = str(item.pop("_id", item.get("id")))
-            menu_items.append(MenuItem(**item))
+        snapshot = await menu_cache.get_snapshot(db)
+        body = snapshot.category_bodies.get(category.value)
         
-        if not menu_items:
+        if body is None:
             raise HTTPException(status_code=404, detail=f"No menu items found for category: {category.value}")
         
-        return menu_items
+        return _prepared_response(request, body)
     except HTTPException:
         raise
     except Exception as e:
@@ -52,6 +107,8 @@ async def create_menu_item(item: MenuItemCreate, db=Depends(get_database)):
         
         if result.inserted_id:
             menu_item.id = str(result.inserted_id)
+            # Never raises: a failed reload only expires the snapshot
+            await menu_cache.invalidate(db)
             return menu_item
         else:
             raise HTTPException(status_code=500, detail="Failed to create menu item")
@@ -60,7 +117,7 @@ async def create_menu_item(item: MenuItemCreate, db=Depends(get_database)):
 
 
 @router.get("/item/{item_id}", response_model=MenuItem)
-async def get_menu_item(item_id: str, db=Depends(get_database)):
+async def get_menu_item(item_id: str, request: Request, response: Response, db=Depends(get_database)):
     """Get a specific menu item by ID"""
     try:
         item = await db.menu_items.find_one({"id": item_id})
@@ -69,7 +126,14 @@ async def get_menu_item(item_id: str, db=Depends(get_database)):
         
         # Convert MongoDB _id to id
         item["id"] = str(item.pop("_id", item.get("id")))
-        return MenuItem(**item)
+        menu_item = MenuItem(**item)
+        
+        etag = make_etag(menu_item)
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+        
+        _set_cache_headers(response, etag)
+        return menu_item
     except HTTPException:
         raise
     except Exception as e:
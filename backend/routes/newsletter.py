@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from typing import Optional
 from datetime import datetime
 from models import NewsletterSubscription, NewsletterSubscribe, NewsletterResponse
 from database import get_database
+from services.pagination import with_keyset, keyset_sort, set_next_cursor
 
 router = APIRouter(prefix="/newsletter", tags=["newsletter"])
 
@@ -111,23 +113,31 @@ async def get_subscription_count(db=Depends(get_database)):
 
 @router.get("/subscriptions")
 async def get_all_subscriptions(
+    response: Response,
     active_only: bool = True,
     limit: int = 100,
     skip: int = 0,
+    after: Optional[str] = Query(None, alias="cursor", description="Cursor from X-Next-Cursor"),
     db=Depends(get_database)
 ):
     """Get all newsletter subscriptions (admin functionality)"""
     try:
         query = {"is_active": True} if active_only else {}
+        query = with_keyset(query, "subscribed_at", after)
         
-        cursor = db.newsletter_subscriptions.find(query).sort("subscribed_at", -1).skip(skip).limit(limit)
+        cursor = db.newsletter_subscriptions.find(query).sort(keyset_sort("subscribed_at")).skip(skip).limit(limit)
         subscriptions = []
+        last_key = None
         async for sub in cursor:
+            last_key = (sub["subscribed_at"], sub.get("id"))
             # Convert MongoDB _id to id
             sub["id"] = str(sub.pop("_id", sub.get("id")))
             subscriptions.append(NewsletterSubscription(**sub))
         
+        set_next_cursor(response, last_key, len(subscriptions), limit)
         return subscriptions
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch subscriptions: {str(e)}")
\ No newline at end of file
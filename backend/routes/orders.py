@@ -1,9 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from typing import List
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List, Optional
 from models import Order, OrderCreate, OrderStatusUpdate, OrderStatus
 from database import get_database, generate_order_number
-from services.email_service import email_service
+from services.order_status import change_order_status, StatusTransitionError
+from services.order_stats import record_order_created
+from services.order_search import search_keys, normalize_phone
+from services.order_events import order_events, ORDER_CREATED
+from services.notification_outbox import insert_order_with_notifications
+from services.order_archive import find_order, find_orders
+from services.pagination import with_keyset, keyset_sort, set_next_cursor
+from services.serialization import ORDER_PROJECTION, order_document, orders_response
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
@@ -11,7 +17,6 @@ router = APIRouter(prefix="/orders", tags=["orders"])
 @router.post("/", response_model=Order)
 async def create_order(
     order_data: OrderCreate, 
-    background_tasks: BackgroundTasks,
     db=Depends(get_database)
 ):
     """Create a new order with automatic notifications"""
@@ -32,12 +37,15 @@ async def create_order(
         )
         
         # Insert into database
-        result = await db.orders.insert_one(order.dict())
+        order_doc = order.dict()
+        order_doc["search"] = search_keys(order_doc["customer"])
+        order_doc["phone_key"] = normalize_phone(order_doc["customer"]["phone"])
+        # Email and printer notifications go through the outbox, delivered by notification_worker.py
+        result = await insert_order_with_notifications(db, order_doc)
         
         if result.inserted_id:
-            # Add background tasks for notifications
-            background_tasks.add_task(email_service.send_order_notification, order)
-            background_tasks.add_task(email_service.send_order_to_printer, order)
+            await record_order_created(db, order_doc)
+            order_events.publish(ORDER_CREATED, order_doc)
             
             return order
         else:
@@ -53,7 +61,7 @@ async def create_order(
 async def get_order(order_id: str, db=Depends(get_database)):
     """Get order by ID"""
     try:
-        order = await db.orders.find_one({"id": order_id})
+        order = await find_order(db, {"id": order_id})
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
         
@@ -71,7 +79,7 @@ async def get_order(order_id: str, db=Depends(get_database)):
 async def get_order_by_number(order_number: str, db=Depends(get_database)):
     """Get order by order number"""
     try:
-        order = await db.orders.find_one({"order_number": order_number})
+        order = await find_order(db, {"order_number": order_number})
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
         
@@ -89,30 +97,15 @@ async def get_order_by_number(order_number: str, db=Depends(get_database)):
 async def update_order_status(order_id: str, status_update: OrderStatusUpdate, db=Depends(get_database)):
     """Update order status"""
     try:
-        # Find the order first
-        order = await db.orders.find_one({"id": order_id})
-        if not order:
+        updated_order = await change_order_status(db, order_id, status_update.status)
+        if not updated_order:
             raise HTTPException(status_code=404, detail="Order not found")
         
-        # Update status and timestamp
-        update_data = {
-            "status": status_update.status.value,
-            "updated_at": datetime.utcnow()
-        }
-        
-        result = await db.orders.update_one(
-            {"id": order_id},
-            {"$set": update_data}
-        )
-        
-        if result.modified_count == 0:
-            raise HTTPException(status_code=400, detail="Failed to update order status")
-        
-        # Return updated order
-        updated_order = await db.orders.find_one({"id": order_id})
         updated_order["id"] = str(updated_order.pop("_id", updated_order.get("id")))
         return Order(**updated_order)
         
+    except StatusTransitionError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -124,39 +117,56 @@ async def get_orders(
     status: OrderStatus = None, 
     limit: int = 50,
     skip: int = 0,
+    after: Optional[str] = Query(None, alias="cursor", description="Cursor from X-Next-Cursor"),
     db=Depends(get_database)
 ):
-    """Get orders with optional filtering"""
+    """Get orders with optional filtering, newest first, keyset-paginated"""
     try:
         query = {}
         if status:
             query["status"] = status.value
+        query = with_keyset(query, "created_at", after)
         
-        cursor = db.orders.find(query).sort("created_at", -1).skip(skip).limit(limit)
-        orders = []
-        async for order in cursor:
-            # Convert MongoDB _id to id
-            order["id"] = str(order.pop("_id", order.get("id")))
-            orders.append(Order(**order))
+        # Finished orders past the archive age live in orders_archive
+        docs = await find_orders(
+            db, query, ORDER_PROJECTION, keyset_sort("created_at"), limit, skip, include_archive=True
+        )
+        orders = [order_document(order) for order in docs]
+        last_key = (docs[-1]["created_at"], docs[-1].get("id")) if docs else None
         
-        return orders
+        response = orders_response(orders)
+        set_next_cursor(response, last_key, len(orders), limit)
+        return response
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch orders: {str(e)}")
 
 
 @router.get("/customer/{phone}", response_model=List[Order])
-async def get_customer_orders(phone: str, db=Depends(get_database)):
-    """Get orders by customer phone number"""
+async def get_customer_orders(
+    phone: str,
+    limit: int = Query(20, ge=1, le=100),
+    after: Optional[str] = Query(None, alias="cursor", description="Cursor from X-Next-Cursor"),
+    db=Depends(get_database)
+):
+    """Get orders by customer phone number in any format, newest first, keyset-paginated"""
     try:
-        cursor = db.orders.find({"customer.phone": phone}).sort("created_at", -1)
-        orders = []
-        async for order in cursor:
-            # Convert MongoDB _id to id
-            order["id"] = str(order.pop("_id", order.get("id")))
-            orders.append(Order(**order))
+        query = with_keyset({"phone_key": normalize_phone(phone)}, "created_at", after)
         
-        return orders
+        # A regular's older orders have moved to orders_archive
+        docs = await find_orders(
+            db, query, ORDER_PROJECTION, keyset_sort("created_at"), limit, include_archive=True
+        )
+        orders = [order_document(order) for order in docs]
+        last_key = (docs[-1]["created_at"], docs[-1].get("id")) if docs else None
         
+        response = orders_response(orders)
+        set_next_cursor(response, last_key, len(orders), limit)
+        return response
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch customer orders: {str(e)}")
\ No newline at end of file
@@ -4,13 +4,18 @@ from starlette.middleware.cors import CORSMiddleware
 import os
 import logging
 from pathlib import Path
-from database import connect_to_mongo, close_mongo_connection
-from routes import menu, orders, newsletter, admin
-
 
 ROOT_DIR = Path(__file__).parent
+# Before the imports below: several of those modules read their settings at import time
 load_dotenv(ROOT_DIR / '.env')
 
+from database import db, connect_to_mongo, close_mongo_connection, mongo_pool_options, pool_stats
+from services.menu_cache import menu_cache
+from services.order_events import order_events
+from services.active_orders import active_orders
+from services.order_archive import order_archiver
+from routes import menu, orders, newsletter, admin, analytics
+
 # Create the main app without a prefix
 app = FastAPI(
     title="Tantawan Restaurant API",
@@ -26,6 +31,7 @@ api_router.include_router(menu.router)
 api_router.include_router(orders.router)
 api_router.include_router(newsletter.router)
 api_router.include_router(admin.router)
+api_router.include_router(analytics.router)
 
 # Health check endpoint
 @api_router.get("/")
@@ -36,6 +42,10 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "Tantawan Restaurant API"}
 
+@api_router.get("/health/pool")
+async def pool_health():
+    return {"config": mongo_pool_options(), "stats": pool_stats.as_dict()}
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -45,6 +55,7 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # Configure logging
@@ -57,7 +68,20 @@ logger = logging.getLogger(__name__)
 @app.on_event("startup")
 async def startup_db_client():
     await connect_to_mongo()
+    
+    # Warm the menu snapshot so the first visitor does not pay for it
+    try:
+        await menu_cache.load(db.database)
+    except Exception as e:
+        logger.warning(f"Could not preload menu snapshot: {e}")
+    
+    order_events.start(db.database)
+    active_orders.start(db.database)
+    order_archiver.start(db.database)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await order_events.stop()
+    await active_orders.stop()
+    await order_archiver.stop()
     await close_mongo_connection()
\ No newline at end of file
@@ -16,15 +16,15 @@ print(f"🔍 Script läuft von: {SCRIPT_DIR}")
 print(f"🔍 Suche .env-Datei: {ENV_FILE}")
 
 if ENV_FILE.exists():
-    # .env manuell laden
+    # .env manuell laden, bereits gesetzte Umgebungsvariablen haben Vorrang
     with open(ENV_FILE, 'r') as f:
         for line in f:
             if line.strip() and not line.startswith('#'):
                 if '=' in line:
                     key, value = line.strip().split('=', 1)
-                    os.environ[key] = value
+                    os.environ.setdefault(key, value)
     print(f"✅ .env-Datei manuell geladen!")
-else:
+elif not os.environ.get("DATABASE_URL"):
     print(f"❌ .env-Datei nicht gefunden: {ENV_FILE}")
     sys.exit(1)
 
@@ -42,18 +42,38 @@ if not DATABASE_URL:
 # Jetzt erst die anderen Imports
 from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, String, Float, DateTime, Boolean, Text, Integer, ForeignKey, text
+from sqlalchemy import Column, String, Float, DateTime, Boolean, Text, Integer, ForeignKey, Index, text, insert, update, select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session, relationship
-from typing import List, Dict, Any
+from sqlalchemy.orm import relationship, selectinload
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import uuid
+from sql_pool import sql_pool_options, sql_pool_stats
+from models import OrderStatus, allowed_previous_statuses
+
+def to_async_url(url: str) -> str:
+    """Use the asyncio driver for the configured database (asyncpg / aiosqlite)"""
+    for prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
 
 # Database Setup
 try:
     print("🔌 Erstelle Datenbank-Engine...")
-    engine = create_engine(DATABASE_URL, echo=False)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+    engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=False,
+        **sql_pool_options(ASYNC_DATABASE_URL, use_async=True)
+    )
+    SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
     print("✅ Datenbank-Engine erfolgreich erstellt!")
 except Exception as e:
     print(f"❌ Datenbankverbindung fehlgeschlagen: {e}")
@@ -64,6 +84,10 @@ Base = declarative_base()
 # === DATABASE MODELS ===
 class MenuItemDB(Base):
     __tablename__ = "menu_items"
+    __table_args__ = (
+        # Serves both the available-only and the category listing
+        Index("ix_menu_items_available_category", "available", "category"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     category = Column(String, nullable=False)
@@ -77,6 +101,12 @@ class MenuItemDB(Base):
 
 class OrderDB(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Kitchen queue and pending counts: status IN (...) ORDER BY created_at
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        # Today's orders and stats: created_at range
+        Index("ix_orders_created_at", "created_at"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     order_number = Column(String, unique=True, nullable=False)
@@ -88,46 +118,157 @@ class OrderDB(Base):
     status = Column(String, default="pending")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationship to order items
+    items = relationship("OrderItemDB", back_populates="order")
 
 class OrderItemDB(Base):
     __tablename__ = "order_items"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    order_id = Column(String, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(String, ForeignKey("orders.id"), nullable=False, index=True)
     menu_item_id = Column(String, nullable=False)
     name = Column(String, nullable=False)
     price = Column(Float, nullable=False)
     quantity = Column(Integer, nullable=False)
+    
+    # Relationship
+    order = relationship("OrderDB", back_populates="items")
+
+class OrderCounterDB(Base):
+    __tablename__ = "order_counters"
+    
+    day = Column(String, primary_key=True)
+    last_value = Column(Integer, nullable=False, default=0)
 
 class NewsletterDB(Base):
     __tablename__ = "newsletter_subscriptions"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     email = Column(String, unique=True, nullable=False)
-    is_active = Column(Boolean, default=True)
+    is_active = Column(Boolean, default=True, index=True)
     subscribed_at = Column(DateTime, default=datetime.utcnow)
     unsubscribed_at = Column(DateTime, nullable=True)
 
+def create_missing_indexes(connection):
+    """create_all() skips tables that already exist, so add new indexes explicitly"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
 # Database Dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-def generate_order_number():
-    """Generate unique order number"""
+async def next_order_number(db: AsyncSession) -> str:
+    """Issue the next order number from the per-day counter row.
+    
+    Runs inside the caller's transaction; the counter row stays locked until
+    it commits, so concurrent orders can never get the same number.
+    """
     today = datetime.utcnow().strftime("%Y%m%d")
     
-    # Count today's orders
-    db = SessionLocal()
-    try:
-        count = db.query(OrderDB).filter(OrderDB.order_number.like(f"TW-{today}-%")).count()
-        next_number = count + 1
-        return f"TW-{today}-{next_number:04d}"
-    finally:
-        db.close()
+    next_number = (await db.execute(COUNTER_INCREMENT, {"day": today})).scalar()
+    
+    if next_number is None:
+        # First order of the day: start after numbers issued before the counter existed
+        next_number = (await db.execute(
+            COUNTER_START, {"day": today, "pattern": f"TW-{today}-%"}
+        )).scalar()
+    
+    return f"TW-{today}-{next_number:04d}"
+
+# === QUERIES ===
+# Built here so check_query_plans.py explains exactly what the endpoints run
+ACTIVE_STATUSES = ["pending", "confirmed", "preparing"]
+
+COUNTER_INCREMENT = text(
+    "UPDATE order_counters SET last_value = last_value + 1 "
+    "WHERE day = :day RETURNING last_value"
+)
+
+COUNTER_START = text(
+    "INSERT INTO order_counters (day, last_value) "
+    "SELECT :day, COUNT(*) + 1 FROM orders WHERE order_number LIKE :pattern "
+    "ON CONFLICT (day) DO UPDATE SET last_value = order_counters.last_value + 1 "
+    "RETURNING last_value"
+)
+
+def menu_items_query(category: Optional[str] = None):
+    query = select(MenuItemDB).where(MenuItemDB.available == True)
+    if category is not None:
+        query = query.where(MenuItemDB.category == category)
+    return query
+
+def active_orders_query():
+    """Kitchen queue, oldest first, with items loaded by one extra IN query"""
+    return select(OrderDB).options(selectinload(OrderDB.items)).where(
+        OrderDB.status.in_(ACTIVE_STATUSES)
+    ).order_by(OrderDB.created_at)
+
+def orders_created_between_query(start: datetime, end: datetime):
+    return select(OrderDB).options(selectinload(OrderDB.items)).where(
+        OrderDB.created_at >= start,
+        OrderDB.created_at < end
+    ).order_by(OrderDB.created_at.desc())
+
+def order_items_query(order_ids: List[str]):
+    """The IN query selectinload(OrderDB.items) issues for a page of orders"""
+    return select(OrderItemDB).where(OrderItemDB.order_id.in_(order_ids))
+
+def order_stats_query(start: datetime, end: datetime):
+    """Per-status counts and revenue for [start, end), plus the all-time
+    count per status for the pending total, in one statement"""
+    in_range = (OrderDB.created_at >= start) & (OrderDB.created_at < end)
+    is_pending = OrderDB.status.in_(ACTIVE_STATUSES)
+    return select(
+        OrderDB.status,
+        func.count().filter(in_range).label("today_count"),
+        func.coalesce(func.sum(OrderDB.total).filter(in_range), 0).label("today_revenue"),
+        func.count().label("total_count")
+    ).where(in_range | is_pending).group_by(OrderDB.status)
+
+def order_status_update(order_id: str, new_status: str, previous: List[str]):
+    """The transition rule is part of the WHERE clause, so concurrent
+    updates of the same order cannot both succeed"""
+    return (
+        update(OrderDB)
+        .where(OrderDB.id == order_id, OrderDB.status.in_(previous))
+        .values(status=new_status, updated_at=datetime.utcnow())
+        .returning(OrderDB.id, OrderDB.order_number, OrderDB.status, OrderDB.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+def order_status_query(order_id: str):
+    return select(OrderDB.status).where(OrderDB.id == order_id)
+
+def subscription_query(email: str):
+    return select(NewsletterDB).where(NewsletterDB.email == email)
+
+def active_subscriptions_count_query():
+    return select(func.count()).select_from(NewsletterDB).where(NewsletterDB.is_active == True)
+
+def order_to_dict(order: OrderDB) -> Dict[str, Any]:
+    """Response format for an order with its (already loaded) items"""
+    return {
+        "id": order.id,
+        "order_number": order.order_number,
+        "customer": {
+            "name": order.customer_name,
+            "phone": order.customer_phone,
+            "notes": order.customer_notes
+        },
+        "pickup_time": order.pickup_time.isoformat(),
+        "total": order.total,
+        "status": order.status,
+        "created_at": order.created_at.isoformat(),
+        "items": [{
+            "name": item.name,
+            "price": item.price,
+            "quantity": item.quantity
+        } for item in order.items]
+    }
 
 # === FASTAPI APP ===
 app = FastAPI(
@@ -150,7 +291,9 @@ app.add_middleware(
 async def startup_event():
     try:
         print("🏗️ Erstelle Datenbank-Tabellen...")
-        Base.metadata.create_all(bind=engine)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(create_missing_indexes)
         print("✅ Startup erfolgreich!")
     except Exception as e:
         print(f"❌ Startup-Fehler: {e}")
@@ -168,18 +311,21 @@ async def api_root():
 async def health_check():
     try:
         # Test database connection
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))
-        db.close()
+        async with SessionLocal() as db:
+            await db.execute(text("SELECT 1"))
         return {"status": "healthy", "database": "connected", "service": "Tantawan Restaurant API SQL"}
     except Exception as e:
         return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
 
+@app.get("/api/health/pool")
+async def pool_health():
+    return {"stats": sql_pool_stats(engine)}
+
 @app.get("/api/menu/")
-async def get_all_menu_items(db: Session = Depends(get_db)):
+async def get_all_menu_items(db: AsyncSession = Depends(get_db)):
     """Get all available menu items"""
     try:
-        items = db.query(MenuItemDB).filter(MenuItemDB.available == True).all()
+        items = (await db.execute(menu_items_query())).scalars().all()
         
         result = []
         for item in items:
@@ -200,13 +346,10 @@ async def get_all_menu_items(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.get("/api/menu/{category}")
-async def get_menu_items_by_category(category: str, db: Session = Depends(get_db)):
+async def get_menu_items_by_category(category: str, db: AsyncSession = Depends(get_db)):
     """Get menu items by category"""
     try:
-        items = db.query(MenuItemDB).filter(
-            MenuItemDB.category == category,
-            MenuItemDB.available == True
-        ).all()
+        items = (await db.execute(menu_items_query(category))).scalars().all()
         
         result = []
         for item in items:
@@ -225,12 +368,9 @@ async def get_menu_items_by_category(category: str, db: Session = Depends(get_db
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.post("/api/orders/")
-async def create_order(order_data: Dict[Any, Any], db: Session = Depends(get_db)):
-    """Create new order"""
+async def create_order(order_data: Dict[Any, Any], db: AsyncSession = Depends(get_db)):
+    """Create new order in a single transaction"""
     try:
-        # Generate order number
-        order_number = generate_order_number()
-        
         # Calculate total
         total = sum(item["price"] * item["quantity"] for item in order_data["items"])
         
@@ -240,33 +380,38 @@ async def create_order(order_data: Dict[Any, Any], db: Session = Depends(get_db)
             pickup_time_str = pickup_time_str[:-1] + '+00:00'
         pickup_time = datetime.fromisoformat(pickup_time_str)
         
-        # Create order
-        db_order = OrderDB(
-            order_number=order_number,
-            customer_name=order_data["customer"]["name"],
-            customer_phone=order_data["customer"]["phone"],
-            customer_notes=order_data["customer"].get("notes"),
-            pickup_time=pickup_time,
-            total=total,
-            status="pending"
-        )
-        
-        db.add(db_order)
-        db.commit()
-        db.refresh(db_order)
-        
-        # Create order items
-        for item_data in order_data["items"]:
-            order_item = OrderItemDB(
-                order_id=db_order.id,
-                menu_item_id=item_data["menu_item_id"],
-                name=item_data["name"],
-                price=item_data["price"],
-                quantity=item_data["quantity"]
-            )
-            db.add(order_item)
-        
-        db.commit()
+        # Assign the order number last so the counter row is locked briefly
+        order_number = await next_order_number(db)
+        now = datetime.utcnow()
+        
+        # Create order header
+        db_order = (await db.execute(
+            insert(OrderDB).values(
+                id=str(uuid.uuid4()),
+                order_number=order_number,
+                customer_name=order_data["customer"]["name"],
+                customer_phone=order_data["customer"]["phone"],
+                customer_notes=order_data["customer"].get("notes"),
+                pickup_time=pickup_time,
+                total=total,
+                status="pending",
+                created_at=now,
+                updated_at=now
+            ).returning(OrderDB.__table__)
+        )).one()
+        
+        # Create all order items with one multi-row insert
+        if order_data["items"]:
+            await db.execute(insert(OrderItemDB).values([{
+                "id": str(uuid.uuid4()),
+                "order_id": db_order.id,
+                "menu_item_id": item_data["menu_item_id"],
+                "name": item_data["name"],
+                "price": item_data["price"],
+                "quantity": item_data["quantity"]
+            } for item_data in order_data["items"]]))
+        
+        await db.commit()
         
         # Response format
         return {
@@ -285,117 +430,58 @@ async def create_order(order_data: Dict[Any, Any], db: Session = Depends(get_db)
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to create order: {str(e)}")
 
 @app.get("/api/admin/orders/pending")
-async def get_pending_orders(db: Session = Depends(get_db)):
+async def get_pending_orders(db: AsyncSession = Depends(get_db)):
     """Get pending orders for kitchen"""
     try:
-        orders = db.query(OrderDB).filter(
-            OrderDB.status.in_(["pending", "confirmed", "preparing"])
-        ).order_by(OrderDB.created_at).all()
+        # Items for all orders are fetched with one extra IN query
+        orders = (await db.execute(active_orders_query())).scalars().all()
         
-        result = []
-        for order in orders:
-            # Get order items
-            items = db.query(OrderItemDB).filter(OrderItemDB.order_id == order.id).all()
-            
-            result.append({
-                "id": order.id,
-                "order_number": order.order_number,
-                "customer": {
-                    "name": order.customer_name,
-                    "phone": order.customer_phone,
-                    "notes": order.customer_notes
-                },
-                "pickup_time": order.pickup_time.isoformat(),
-                "total": order.total,
-                "status": order.status,
-                "created_at": order.created_at.isoformat(),
-                "items": [{
-                    "name": item.name,
-                    "price": item.price,
-                    "quantity": item.quantity
-                } for item in items]
-            })
-        
-        return result
+        return [order_to_dict(order) for order in orders]
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.get("/api/admin/orders/today")
-async def get_todays_orders(db: Session = Depends(get_db)):
+async def get_todays_orders(db: AsyncSession = Depends(get_db)):
     """Get today's orders"""
     try:
         today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         tomorrow = today + timedelta(days=1)
         
-        orders = db.query(OrderDB).filter(
-            OrderDB.created_at >= today,
-            OrderDB.created_at < tomorrow
-        ).order_by(OrderDB.created_at.desc()).all()
-        
-        result = []
-        for order in orders:
-            items = db.query(OrderItemDB).filter(OrderItemDB.order_id == order.id).all()
-            
-            result.append({
-                "id": order.id,
-                "order_number": order.order_number,
-                "customer": {
-                    "name": order.customer_name,
-                    "phone": order.customer_phone,
-                    "notes": order.customer_notes
-                },
-                "pickup_time": order.pickup_time.isoformat(),
-                "total": order.total,
-                "status": order.status,
-                "created_at": order.created_at.isoformat(),
-                "items": [{
-                    "name": item.name,
-                    "price": item.price,
-                    "quantity": item.quantity
-                } for item in items]
-            })
+        orders = (await db.execute(orders_created_between_query(today, tomorrow))).scalars().all()
         
-        return result
+        return [order_to_dict(order) for order in orders]
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.get("/api/admin/orders/stats")
-async def get_order_stats(db: Session = Depends(get_db)):
+async def get_order_stats(db: AsyncSession = Depends(get_db)):
     """Get order statistics"""
     try:
         today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         tomorrow = today + timedelta(days=1)
         
-        # Today's orders
-        today_orders = db.query(OrderDB).filter(
-            OrderDB.created_at >= today,
-            OrderDB.created_at < tomorrow
-        ).count()
-        
-        # Today's revenue
-        today_revenue_result = db.query(OrderDB).filter(
-            OrderDB.created_at >= today,
-            OrderDB.created_at < tomorrow
-        ).all()
+        # One statement for today's status counts and revenue and the pending total
+        rows = (await db.execute(order_stats_query(today, tomorrow))).all()
         
-        total_revenue = sum(order.total for order in today_revenue_result)
-        
-        # Pending orders
-        pending_orders = db.query(OrderDB).filter(
-            OrderDB.status.in_(["pending", "confirmed", "preparing"])
-        ).count()
+        status_counts = {row.status: row.today_count for row in rows if row.today_count}
+        today_orders = sum(status_counts.values())
+        total_revenue = sum(row.today_revenue for row in rows)
+        pending_orders = sum(
+            row.total_count for row in rows if row.status in ACTIVE_STATUSES
+        )
         
         return {
             "today": {
                 "orders": today_orders,
                 "revenue": round(total_revenue, 2)
             },
+            "status_counts": status_counts,
             "pending_orders": pending_orders,
             "timestamp": datetime.utcnow().isoformat()
         }
@@ -404,17 +490,30 @@ async def get_order_stats(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.put("/api/admin/orders/{order_id}/status")
-async def update_order_status(order_id: str, status_data: Dict[str, str], db: Session = Depends(get_db)):
-    """Update order status"""
+async def update_order_status(order_id: str, status_data: Dict[str, str], db: AsyncSession = Depends(get_db)):
+    """Update order status with one conditional UPDATE ... RETURNING"""
     try:
-        order = db.query(OrderDB).filter(OrderDB.id == order_id).first()
-        if not order:
-            raise HTTPException(status_code=404, detail="Order not found")
-        
-        order.status = status_data["status"]
-        order.updated_at = datetime.utcnow()
+        try:
+            new_status = OrderStatus(status_data["status"])
+        except (KeyError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid order status")
+        
+        previous = [status.value for status in allowed_previous_statuses(new_status)]
+        
+        order = (await db.execute(
+            order_status_update(order_id, new_status.value, previous)
+        )).one_or_none()
+        
+        if order is None:
+            current_status = await db.scalar(order_status_query(order_id))
+            if current_status is None:
+                raise HTTPException(status_code=404, detail="Order not found")
+            raise HTTPException(
+                status_code=409,
+                detail=f"Cannot change order status from '{current_status}' to '{new_status.value}'"
+            )
         
-        db.commit()
+        await db.commit()
         
         return {
             "id": order.id,
@@ -429,13 +528,13 @@ async def update_order_status(order_id: str, status_data: Dict[str, str], db: Se
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.post("/api/newsletter/subscribe")
-async def subscribe_newsletter(data: Dict[str, str], db: Session = Depends(get_db)):
+async def subscribe_newsletter(data: Dict[str, str], db: AsyncSession = Depends(get_db)):
     """Newsletter subscription"""
     try:
         email = data["email"]
         
         # Check if already exists
-        existing = db.query(NewsletterDB).filter(NewsletterDB.email == email).first()
+        existing = await db.scalar(subscription_query(email))
         
         if existing:
             if existing.is_active:
@@ -450,7 +549,7 @@ async def subscribe_newsletter(data: Dict[str, str], db: Session = Depends(get_d
             subscription = NewsletterDB(email=email)
             db.add(subscription)
         
-        db.commit()
+        await db.commit()
         
         return {
             "message": "Successfully subscribed to newsletter",
@@ -466,10 +565,10 @@ async def subscribe_newsletter(data: Dict[str, str], db: Session = Depends(get_d
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.get("/api/newsletter/subscriptions/count")
-async def get_subscription_count(db: Session = Depends(get_db)):
+async def get_subscription_count(db: AsyncSession = Depends(get_db)):
     """Get newsletter subscription count"""
     try:
-        count = db.query(NewsletterDB).filter(NewsletterDB.is_active == True).count()
+        count = await db.scalar(active_subscriptions_count_query())
         return {"active_subscriptions": count}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -481,13 +580,14 @@ async def startup_event():
         print("🚀 Tantawan API startet...")
         
         # Test database connection
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))
-        db.close()
+        async with SessionLocal() as db:
+            await db.execute(text("SELECT 1"))
         print("✅ Datenbankverbindung erfolgreich!")
         
         # Create tables
-        Base.metadata.create_all(bind=engine)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(create_missing_indexes)
         print("✅ Tabellen erstellt/überprüft!")
         
         print("🎉 Tantawan API bereit!")
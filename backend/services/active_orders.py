@@ -0,0 +1,100 @@
+import asyncio
+import os
+from typing import Dict, List, Optional
+from models import ACTIVE_ORDER_STATUSES
+from services.serialization import ORDER_PROJECTION, order_document
+from services.order_events import order_events, ORDER_DELETED
+import logging
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUS_VALUES = [status.value for status in ACTIVE_ORDER_STATUSES]
+
+
+class ActiveOrderSet:
+    """The kitchen's working set: every pending, confirmed or preparing order.
+
+    Loaded at startup, kept current from order events and reloaded every
+    ACTIVE_ORDERS_RESYNC_SECONDS to repair drift, e.g. from writes made by
+    other worker processes.
+    """
+
+    def __init__(self):
+        self.resync_seconds = float(os.environ.get('ACTIVE_ORDERS_RESYNC_SECONDS', '60'))
+        self.loaded = False
+        self._orders: Dict[str, dict] = {}
+        self._sorted: Optional[List[dict]] = None
+        # Events seen while a reload is reading the database
+        self._replay: Optional[List[dict]] = None
+        self._resync_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def pending(self) -> List[dict]:
+        """Active orders, oldest first like the kitchen display expects"""
+        if self._sorted is None:
+            self._sorted = sorted(self._orders.values(), key=lambda order: order["created_at"])
+        return self._sorted
+
+    def _apply(self, orders: Dict[str, dict], payload: dict):
+        if payload["type"] == ORDER_DELETED:
+            orders.pop(payload["order_id"], None)
+            return
+        order = payload["order"]
+        if order["status"] in ACTIVE_STATUS_VALUES:
+            orders[order["id"]] = order
+        else:
+            orders.pop(order["id"], None)
+
+    def on_event(self, payload: dict):
+        if self._replay is not None:
+            self._replay.append(payload)
+        self._apply(self._orders, payload)
+        self._sorted = None
+
+    async def load(self, db) -> int:
+        """Replace the working set with the database's view, return the drift"""
+        self._replay = []
+        try:
+            cursor = db.orders.find({"status": {"$in": ACTIVE_STATUS_VALUES}}, ORDER_PROJECTION)
+            orders = {}
+            async for doc in cursor:
+                order = order_document(doc)
+                orders[order["id"]] = order
+            for payload in self._replay:
+                self._apply(orders, payload)
+        finally:
+            self._replay = None
+
+        drift = len(set(orders) ^ set(self._orders)) if self.loaded else 0
+        self._orders = orders
+        self._sorted = None
+        self.loaded = True
+        return drift
+
+    def start(self, db):
+        order_events.add_listener(self.on_event)
+        if self._resync_task is None:
+            self._resync_task = asyncio.create_task(self._resync(db))
+
+    async def stop(self):
+        if self._resync_task is not None:
+            self._resync_task.cancel()
+            self._resync_task = None
+
+    async def _resync(self, db):
+        while True:
+            try:
+                drift = await self.load(db)
+                if drift:
+                    logger.warning(f"Active order set was out of sync by {drift} orders")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Could not load active orders: {e}")
+            await asyncio.sleep(self.resync_seconds)
+
+
+# Global active order working set
+active_orders = ActiveOrderSet()
@@ -0,0 +1,82 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List
+from services.order_stats import stats_day, stats_timezone
+
+GRANULARITIES = ("day", "week", "month")
+TOP_ITEMS_METRICS = ("quantity", "revenue")
+
+
+def _period(day: datetime, granularity: str) -> str:
+    """Bucket label a day falls into"""
+    if granularity == "week":
+        return (day - timedelta(days=day.weekday())).strftime("%Y-%m-%d")
+    if granularity == "month":
+        return day.strftime("%Y-%m")
+    return day.strftime("%Y-%m-%d")
+
+
+async def _rollups(db, date_from: datetime, date_to: datetime, fields: List[str]):
+    """Yield (day, document) for the daily_stats rollups in [date_from, date_to)"""
+    projection = {field: 1 for field in fields}
+    cursor = db.daily_stats.find(
+        {"_id": {"$gte": stats_day(date_from), "$lt": stats_day(date_to)}},
+        projection
+    ).sort("_id", 1)
+    async for doc in cursor:
+        yield datetime.strptime(doc["_id"], "%Y-%m-%d"), doc
+
+
+async def revenue_series(db, date_from: datetime, date_to: datetime, granularity: str = "day") -> List[dict]:
+    """Orders and revenue per day, week (starting Monday) or month"""
+    series: Dict[str, dict] = {}
+    async for day, doc in _rollups(db, date_from, date_to, ["orders", "revenue"]):
+        bucket = series.setdefault(_period(day, granularity), {"orders": 0, "revenue": 0.0})
+        bucket["orders"] += doc.get("orders", 0)
+        bucket["revenue"] += doc.get("revenue", 0)
+
+    return [
+        {"period": period, "orders": bucket["orders"], "revenue": round(bucket["revenue"], 2)}
+        for period, bucket in series.items()
+    ]
+
+
+async def top_items(
+    db, date_from: datetime, date_to: datetime, by: str = "quantity", limit: int = 10
+) -> List[dict]:
+    """Best-selling dishes by quantity or revenue"""
+    totals = defaultdict(lambda: {"name": None, "quantity": 0, "revenue": 0.0})
+    async for _, doc in _rollups(db, date_from, date_to, ["items"]):
+        for menu_item_id, bucket in doc.get("items", {}).items():
+            # Days are read oldest first, so the latest dish name wins
+            totals[menu_item_id]["name"] = bucket.get("name", totals[menu_item_id]["name"])
+            totals[menu_item_id]["quantity"] += bucket.get("quantity", 0)
+            totals[menu_item_id]["revenue"] += bucket.get("revenue", 0)
+
+    ranked = sorted(totals.items(), key=lambda entry: entry[1][by], reverse=True)[:limit]
+
+    return [
+        {
+            "menu_item_id": menu_item_id,
+            "name": total["name"],
+            "quantity": total["quantity"],
+            "revenue": round(total["revenue"], 2)
+        }
+        for menu_item_id, total in ranked
+    ]
+
+
+async def hour_of_week_heatmap(db, date_from: datetime, date_to: datetime) -> dict:
+    """Order counts in a 7 x 24 grid, rows Monday..Sunday, columns local hour of day"""
+    orders = [[0] * 24 for _ in range(7)]
+    revenue = [[0.0] * 24 for _ in range(7)]
+    async for day, doc in _rollups(db, date_from, date_to, ["hours"]):
+        for hour, bucket in doc.get("hours", {}).items():
+            orders[day.weekday()][int(hour)] += bucket.get("orders", 0)
+            revenue[day.weekday()][int(hour)] += bucket.get("revenue", 0)
+
+    return {
+        "timezone": stats_timezone().key,
+        "orders": orders,
+        "revenue": [[round(value, 2) for value in row] for row in revenue]
+    }
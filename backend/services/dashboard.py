@@ -0,0 +1,80 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+import orjson
+from models import ACTIVE_ORDER_STATUSES
+from services.serialization import ORDER_PROJECTION, order_document
+from services.order_stats import get_daily_stats, local_day_window
+from services.active_orders import active_orders
+
+
+class SingleFlightCache:
+    """Short-lived cache where concurrent misses for a key share one computation"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._values: Dict[str, Tuple[float, Any]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._values.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fill(key, compute))
+            self._inflight[key] = future
+        # A caller that goes away must not cancel the work the others wait for
+        return await asyncio.shield(future)
+
+    async def _fill(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await compute()
+            self._values = {k: v for k, v in self._values.items() if v[0] > time.monotonic()}
+            self._values[key] = (time.monotonic() + self.ttl, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self):
+        self._values.clear()
+
+
+async def find_pending_orders(db) -> List[dict]:
+    """Active orders for the kitchen display, oldest first"""
+    if active_orders.loaded:
+        return active_orders.pending()
+
+    cursor = db.orders.find({
+        "status": {"$in": [status.value for status in ACTIVE_ORDER_STATUSES]}
+    }, ORDER_PROJECTION).sort("created_at", 1)
+    return [order_document(order) async for order in cursor]
+
+
+async def find_todays_orders(db, today: datetime) -> List[dict]:
+    """Orders created on the local day of `today`, newest first"""
+    start, end = local_day_window(today)
+    cursor = db.orders.find({
+        "created_at": {"$gte": start, "$lt": end}
+    }, ORDER_PROJECTION).sort("created_at", -1)
+    return [order_document(order) async for order in cursor]
+
+
+async def build_dashboard(db, today: datetime) -> bytes:
+    """Today's orders, pending orders and stats, encoded once for every caller.
+
+    The order list and the stats cover the same local day.
+    """
+    todays_orders, pending, stats = await asyncio.gather(
+        find_todays_orders(db, today),
+        find_pending_orders(db),
+        get_daily_stats(db, today)
+    )
+    return orjson.dumps({"today_orders": todays_orders, "pending_orders": pending, "stats": stats})
+
+
+# Every open terminal asks for the same data; compute it at most once per TTL
+dashboard_cache = SingleFlightCache(float(os.environ.get('DASHBOARD_CACHE_TTL_SECONDS', '2')))
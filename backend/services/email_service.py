@@ -1,10 +1,10 @@
-import smtplib
 import os
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 from typing import List
 from models import Order, OrderItem
+from services.smtp_pool import SMTPConnectionPool
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,6 +19,25 @@ class EmailService:
         self.smtp_password = os.environ.get('SMTP_PASSWORD', '')
         self.restaurant_email = os.environ.get('RESTAURANT_EMAIL', 'info@tantawan.ch')
         self.printer_email = os.environ.get('PRINTER_EMAIL', '')  # Email-to-print service
+        # Set SMTP_AUTH=false for relays without login, e.g. a local aiosmtpd
+        self.smtp_auth = os.environ.get('SMTP_AUTH', 'true').lower() in ('1', 'true', 'yes')
+        self.sender = self.smtp_username or self.restaurant_email
+        
+        self.smtp_pool = SMTPConnectionPool(
+            hostname=self.smtp_server,
+            port=self.smtp_port,
+            username=self.smtp_username if self.smtp_auth else '',
+            password=self.smtp_password if self.smtp_auth else '',
+            size=int(os.environ.get('SMTP_POOL_SIZE', '2')),
+            timeout=float(os.environ.get('SMTP_TIMEOUT', '10')),
+            use_tls=os.environ.get('SMTP_USE_TLS', str(self.smtp_port == 465)).lower() in ('1', 'true', 'yes'),
+            starttls=os.environ.get('SMTP_STARTTLS', 'true').lower() in ('1', 'true', 'yes'),
+            max_idle=float(os.environ.get('SMTP_MAX_IDLE_SECONDS', '60')),
+        )
+    
+    @property
+    def configured(self) -> bool:
+        return not self.smtp_auth or bool(self.smtp_username and self.smtp_password)
         
     def format_order_for_print(self, order: Order) -> str:
         """Format order for kitchen printing"""
@@ -129,16 +148,16 @@ Bestellt am: {order.created_at.strftime("%d.%m.%Y %H:%M")}
         
         return html_content
     
-    async def send_order_notification(self, order: Order) -> bool:
+    async def send_order_notification(self, order: Order, raise_errors: bool = False) -> bool:
         """Send order notification email to restaurant"""
         try:
-            if not self.smtp_username or not self.smtp_password:
+            if not self.configured:
                 logger.warning("SMTP credentials not configured, skipping email notification")
                 return False
                 
             msg = MIMEMultipart('alternative')
             msg['Subject'] = f'🍴 Neue Bestellung #{order.order_number} - Tantawan'
-            msg['From'] = self.smtp_username
+            msg['From'] = self.sender
             msg['To'] = self.restaurant_email
             
             # Plain text version
@@ -153,42 +172,44 @@ Bestellt am: {order.created_at.strftime("%d.%m.%Y %H:%M")}
             msg.attach(html_part)
             
             # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(msg)
+            await self.smtp_pool.send(msg)
             
             logger.info(f"Order notification email sent successfully for order {order.order_number}")
             return True
             
         except Exception as e:
             logger.error(f"Failed to send order notification email: {str(e)}")
+            if raise_errors:
+                raise
             return False
     
-    async def send_order_to_printer(self, order: Order) -> bool:
+    async def send_order_to_printer(self, order: Order, raise_errors: bool = False) -> bool:
         """Send order to printer via email-to-print service"""
         try:
-            if not self.printer_email or not self.smtp_username:
+            if not self.printer_email or not self.configured:
                 logger.warning("Printer email not configured, skipping print")
                 return False
                 
             msg = MIMEText(self.format_order_for_print(order), 'plain', 'utf-8')
             msg['Subject'] = f'PRINT: Bestellung #{order.order_number}'
-            msg['From'] = self.smtp_username
+            msg['From'] = self.sender
             msg['To'] = self.printer_email
             
             # Send to printer
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(msg)
+            await self.smtp_pool.send(msg)
             
             logger.info(f"Order sent to printer successfully for order {order.order_number}")
             return True
             
         except Exception as e:
             logger.error(f"Failed to send order to printer: {str(e)}")
+            if raise_errors:
+                raise
             return False
+    
+    async def close(self):
+        """Close pooled SMTP connections on shutdown"""
+        await self.smtp_pool.close()
 
 
 # Global email service instance
@@ -0,0 +1,158 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+from fastapi.encoders import jsonable_encoder
+from models import MenuItem
+import logging
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip and identity still work
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+def serialize(payload: Any) -> bytes:
+    """Encode a payload exactly like FastAPI's JSONResponse would"""
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def make_etag(payload: Any) -> str:
+    """Strong ETag from a content hash of the JSON representation"""
+    return '"' + hashlib.sha256(serialize(payload)).hexdigest()[:32] + '"'
+
+
+class PreparedBody:
+    """JSON response bytes, encoded once per snapshot for every content coding"""
+
+    def __init__(self, payload: Any):
+        identity = serialize(payload)
+        self.digest = hashlib.sha256(identity).hexdigest()[:32]
+        self.encodings: Dict[str, bytes] = {
+            "identity": identity,
+            "gzip": gzip.compress(identity, compresslevel=9),
+        }
+        if brotli is not None:
+            self.encodings["br"] = brotli.compress(identity, quality=11)
+
+    def etag(self, encoding: str) -> str:
+        # Strong ETags must differ between content codings of the same data
+        if encoding == "identity":
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{encoding}"'
+
+
+class MenuSnapshot:
+    """Immutable view of the available menu at one version"""
+
+    def __init__(self, version: int, items: List[MenuItem]):
+        self.version = version
+        self.items = items
+        self.loaded_at = time.monotonic()
+
+        self.by_category: Dict[str, List[MenuItem]] = {}
+        for item in items:
+            self.by_category.setdefault(item.category.value, []).append(item)
+
+        # Pay for validation, JSON encoding and compression here instead of
+        # on every request. ETags come from content hashes rather than the
+        # version number, so every worker agrees on them.
+        self.body = PreparedBody(items)
+        self.category_bodies = {
+            category: PreparedBody(category_items)
+            for category, category_items in self.by_category.items()
+        }
+
+
+class MenuCache:
+    def __init__(self):
+        # Snapshots older than this are reloaded on the next read, so that
+        # other worker processes pick up menu writes they did not see
+        self.max_age = float(os.environ.get('MENU_CACHE_TTL_SECONDS', '300'))
+        # After a failed reload the stale snapshot is served this long before retrying
+        self.retry_after = 5.0
+        self.snapshot: Optional[MenuSnapshot] = None
+        self._version = 0
+        self._failed_at: Optional[float] = None
+        # Set when a reload after a menu write failed; the next read retries it
+        self._expired = False
+        self._lock = asyncio.Lock()
+
+    def _needs_reload(self) -> bool:
+        snapshot = self.snapshot
+        if snapshot is None:
+            return True
+        now = time.monotonic()
+        if self._failed_at is not None and now - self._failed_at < self.retry_after:
+            return False
+        return self._expired or now - snapshot.loaded_at > self.max_age
+
+    async def load(self, db, only_if_expired: bool = False) -> MenuSnapshot:
+        """Rebuild the snapshot from the database"""
+        async with self._lock:
+            # Requests that queued behind a reload get its result instead of repeating it
+            if only_if_expired and not self._needs_reload():
+                return self.snapshot
+
+            try:
+                cursor = db.menu_items.find({"available": True})
+                menu_items = []
+                async for item in cursor:
+                    # Convert MongoDB _id to id
+                    item["id"] = str(item.pop("_id", item.get("id")))
+                    menu_items.append(MenuItem(**item))
+            except Exception:
+                self._failed_at = time.monotonic()
+                raise
+
+            self._version += 1
+            # JSON encoding and gzip / brotli at maximum levels take a while
+            # for the full menu; keep them off the event loop
+            self.snapshot = await asyncio.to_thread(MenuSnapshot, self._version, menu_items)
+            self._failed_at = None
+            self._expired = False
+            logger.info(f"Menu snapshot v{self._version} loaded with {len(menu_items)} items")
+            return self.snapshot
+
+    async def get_snapshot(self, db) -> MenuSnapshot:
+        """Return the current snapshot, loading it if missing or expired"""
+        if not self._needs_reload():
+            return self.snapshot
+        try:
+            return await self.load(db, only_if_expired=True)
+        except Exception as e:
+            if self.snapshot is None:
+                raise
+            # A stale menu beats an error page
+            logger.warning(f"Menu reload failed, serving snapshot v{self.snapshot.version}: {e}")
+            return self.snapshot
+
+    async def invalidate(self, db) -> Optional[MenuSnapshot]:
+        """Write-through invalidation, call after every menu write.
+
+        The write has already happened, so a failed reload must not turn it
+        into an error: the snapshot is marked expired and the next read
+        loads it again.
+        """
+        try:
+            return await self.load(db)
+        except Exception as e:
+            self._expired = True
+            self._failed_at = None
+            logger.warning(f"Menu reload after a write failed, reloading on the next read: {e}")
+            return None
+
+
+# Global menu cache instance
+menu_cache = MenuCache()
@@ -0,0 +1,211 @@
+import asyncio
+import os
+import random
+from datetime import datetime, timedelta
+from typing import List, Optional
+from pymongo import ReturnDocument
+from models import Order
+from services.email_service import email_service
+from services.order_archive import find_order
+import logging
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_COLLECTION = "notification_outbox"
+
+ORDER_EMAIL = "order_email"
+ORDER_PRINT = "order_print"
+ORDER_NOTIFICATIONS = [ORDER_EMAIL, ORDER_PRINT]
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+# Entries are written just before their order; give the order insert a head start
+FIRST_ATTEMPT_DELAY = timedelta(seconds=1)
+
+# An order still missing after this long was never stored, see insert_order_with_notifications
+ORDER_INSERT_GRACE = timedelta(seconds=30)
+
+
+class OrderNotFound(Exception):
+    """The outbox entry was written before its order, or the order insert failed"""
+
+
+def outbox_entry(kind: str, order_id: str) -> dict:
+    now = datetime.utcnow()
+    return {
+        "kind": kind,
+        "order_id": order_id,
+        "status": PENDING,
+        "attempts": 0,
+        "next_attempt_at": now + FIRST_ATTEMPT_DELAY,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def claimable_filter(now: datetime) -> dict:
+    """Entries due for delivery, and entries whose worker's lease ran out"""
+    return {"$or": [
+        {"status": PENDING, "next_attempt_at": {"$lte": now}},
+        {"status": SENDING, "locked_until": {"$lt": now}},
+    ]}
+
+
+async def insert_order_with_notifications(db, order_doc: dict, kinds: List[str] = ORDER_NOTIFICATIONS):
+    """Write an order together with its outbox entries.
+
+    With OUTBOX_TRANSACTIONS=true (replica set required) both writes commit
+    atomically. Otherwise the outbox is written first, so a stored order can
+    never miss its kitchen ticket. If the order insert then fails, the
+    entries are removed again; should that fail too, the worker finds no
+    order and gives them up once ORDER_INSERT_GRACE has passed.
+    """
+    entries = [outbox_entry(kind, order_doc["id"]) for kind in kinds]
+
+    if os.environ.get('OUTBOX_TRANSACTIONS', 'false').lower() in ('1', 'true', 'yes'):
+        async with await db.client.start_session() as session:
+            async with session.start_transaction():
+                await db[OUTBOX_COLLECTION].insert_many(entries, session=session)
+                return await db.orders.insert_one(order_doc, session=session)
+
+    await db[OUTBOX_COLLECTION].insert_many(entries)
+    try:
+        return await db.orders.insert_one(order_doc)
+    except Exception:
+        try:
+            await db[OUTBOX_COLLECTION].delete_many({"_id": {"$in": [entry["_id"] for entry in entries]}})
+        except Exception as e:
+            logger.warning(f"Could not remove outbox entries of unsaved order {order_doc['id']}: {e}")
+        raise
+
+
+class NotificationWorker:
+    """Drains the outbox in batches, retrying failures with exponential backoff"""
+
+    def __init__(self, db):
+        self.db = db
+        self.batch_size = int(os.environ.get('OUTBOX_BATCH_SIZE', '20'))
+        self.poll_seconds = float(os.environ.get('OUTBOX_POLL_SECONDS', '2'))
+        self.max_attempts = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '8'))
+        self.backoff_base = float(os.environ.get('OUTBOX_BACKOFF_SECONDS', '5'))
+        self.backoff_max = float(os.environ.get('OUTBOX_BACKOFF_MAX_SECONDS', '900'))
+        # An entry claimed by a worker that died becomes available again after this
+        self.lease_seconds = float(os.environ.get('OUTBOX_LEASE_SECONDS', '120'))
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await self.db[OUTBOX_COLLECTION].find_one_and_update(
+            claimable_filter(now),
+            {
+                "$set": {
+                    "status": SENDING,
+                    "locked_until": now + timedelta(seconds=self.lease_seconds),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def claim_batch(self) -> List[dict]:
+        batch = []
+        while len(batch) < self.batch_size:
+            entry = await self._claim()
+            if entry is None:
+                break
+            batch.append(entry)
+        return batch
+
+    async def _load_order(self, order_id: str) -> Order:
+        doc = await find_order(self.db, {"id": order_id})
+        if doc is None:
+            raise OrderNotFound(order_id)
+        doc.pop("_id", None)
+        return Order(**doc)
+
+    async def _send(self, entry: dict) -> bool:
+        order = await self._load_order(entry["order_id"])
+        if entry["kind"] == ORDER_EMAIL:
+            return await email_service.send_order_notification(order, raise_errors=True)
+        if entry["kind"] == ORDER_PRINT:
+            return await email_service.send_order_to_printer(order, raise_errors=True)
+        raise ValueError(f"Unknown notification kind: {entry['kind']}")
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        # Jitter keeps retries of a failed burst from arriving together
+        return delay * random.uniform(0.5, 1.0)
+
+    async def deliver(self, entry: dict):
+        outbox = self.db[OUTBOX_COLLECTION]
+        now = datetime.utcnow()
+        try:
+            delivered = await self._send(entry)
+        except OrderNotFound:
+            await self._order_missing(entry, now)
+            return
+        except Exception as e:
+            if entry["attempts"] >= self.max_attempts:
+                logger.error(f"Giving up on {entry['kind']} for order {entry['order_id']}: {e}")
+                update = {"status": FAILED}
+            else:
+                update = {
+                    "status": PENDING,
+                    "next_attempt_at": now + timedelta(seconds=self._backoff(entry["attempts"]))
+                }
+            await outbox.update_one(
+                {"_id": entry["_id"]},
+                {"$set": {**update, "last_error": str(e), "updated_at": now}, "$unset": {"locked_until": ""}}
+            )
+            return
+
+        # False means the channel is not configured, retrying would not help
+        await outbox.update_one(
+            {"_id": entry["_id"]},
+            {
+                "$set": {"status": SENT if delivered else SKIPPED, "sent_at": now, "updated_at": now},
+                "$unset": {"locked_until": ""}
+            }
+        )
+
+    async def _order_missing(self, entry: dict, now: datetime):
+        """The order insert may still be on its way; wait for it without using up an attempt"""
+        outbox = self.db[OUTBOX_COLLECTION]
+        if now - entry["created_at"] < ORDER_INSERT_GRACE:
+            update = {
+                "$set": {"status": PENDING, "next_attempt_at": now + FIRST_ATTEMPT_DELAY, "updated_at": now},
+                "$inc": {"attempts": -1}
+            }
+        else:
+            # The order insert failed; retrying cannot bring it back
+            logger.warning(f"Dropping {entry['kind']} for order {entry['order_id']}, the order was never stored")
+            update = {"$set": {"status": FAILED, "last_error": "Order not found", "updated_at": now}}
+        update["$unset"] = {"locked_until": ""}
+        await outbox.update_one({"_id": entry["_id"]}, update)
+
+    async def run_once(self) -> int:
+        """Deliver one batch, return how many entries were claimed"""
+        batch = await self.claim_batch()
+        if batch:
+            # The SMTP pool bounds how many of these talk to the server at once
+            await asyncio.gather(*(self.deliver(entry) for entry in batch))
+        return len(batch)
+
+    async def run(self):
+        logger.info("Notification worker started")
+        try:
+            while True:
+                try:
+                    claimed = await self.run_once()
+                except Exception as e:
+                    logger.error(f"Notification worker batch failed: {e}")
+                    claimed = 0
+                if claimed < self.batch_size:
+                    await asyncio.sleep(self.poll_seconds)
+        finally:
+            await email_service.close()
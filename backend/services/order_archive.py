@@ -0,0 +1,147 @@
+import asyncio
+import heapq
+import os
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, List, Optional
+from pymongo import ReplaceOne
+from models import OrderStatus
+import logging
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COLLECTION = "orders_archive"
+
+# Only finished orders leave the hot collection
+ARCHIVED_STATUSES = [OrderStatus.COMPLETED.value, OrderStatus.CANCELLED.value]
+
+ARCHIVE_BATCH_SIZE = 500
+
+
+def archive_after_days() -> int:
+    return int(os.environ.get('ORDER_ARCHIVE_AFTER_DAYS', '90'))
+
+
+def archive_cutoff() -> datetime:
+    """Finished orders created before this live in orders_archive"""
+    midnight = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight - timedelta(days=archive_after_days())
+
+
+def reaches_archive(date_from: Optional[datetime]) -> bool:
+    """Whether a created_at range starting at date_from can contain archived orders"""
+    return date_from is None or date_from < archive_cutoff()
+
+
+def archivable_filter(cutoff: datetime) -> dict:
+    return {"status": {"$in": ARCHIVED_STATUSES}, "created_at": {"$lt": cutoff}}
+
+
+async def archive_orders(db, cutoff: Optional[datetime] = None) -> int:
+    """Move finished orders created before cutoff into orders_archive.
+
+    Each batch is copied with idempotent upserts before it is deleted, so an
+    interrupted run at worst leaves orders in both collections until the
+    next run moves them again.
+    """
+    cutoff = cutoff or archive_cutoff()
+    query = archivable_filter(cutoff)
+    moved = 0
+
+    while True:
+        batch = await db.orders.find(query).sort("created_at", 1).limit(ARCHIVE_BATCH_SIZE).to_list(None)
+        if not batch:
+            return moved
+
+        await db[ARCHIVE_COLLECTION].bulk_write(
+            [ReplaceOne({"_id": order["_id"]}, order, upsert=True) for order in batch],
+            ordered=False
+        )
+        result = await db.orders.delete_many({
+            "_id": {"$in": [order["_id"] for order in batch]},
+            "status": {"$in": ARCHIVED_STATUSES}
+        })
+        moved += result.deleted_count
+
+
+async def find_order(db, query: dict, projection: Optional[dict] = None) -> Optional[dict]:
+    """A single order from the hot collection, falling back to the archive"""
+    order = await db.orders.find_one(query, projection)
+    if order is None:
+        order = await db[ARCHIVE_COLLECTION].find_one(query, projection)
+    return order
+
+
+async def find_orders(
+    db, query: dict, projection: dict, sort: list, limit: int, skip: int = 0,
+    include_archive: bool = False
+) -> List[dict]:
+    """One page of orders from the hot collection and, if asked, the archive"""
+    if not include_archive:
+        return await db.orders.find(query, projection).sort(sort).skip(skip).limit(limit).to_list(None)
+
+    # Either side may hold the whole page, so both are read up to skip + limit
+    window = skip + limit
+    hot = await db.orders.find(query, projection).sort(sort).limit(window).to_list(None)
+    cold = await db[ARCHIVE_COLLECTION].find(query, projection).sort(sort).limit(window).to_list(None)
+
+    fields = [field for field, _ in sort]
+    merged = heapq.merge(
+        hot, cold,
+        key=lambda doc: tuple(doc.get(field) for field in fields),
+        reverse=sort[0][1] < 0
+    )
+    return list(merged)[skip:window]
+
+
+async def merge_streams(
+    first: AsyncIterator[dict], second: AsyncIterator[dict], key: Callable[[dict], tuple]
+) -> AsyncIterator[dict]:
+    """Merge two ascending async streams into one ascending stream"""
+    async def advance(stream):
+        try:
+            return await stream.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    a = await advance(first)
+    b = await advance(second)
+    while a is not None or b is not None:
+        if b is None or (a is not None and key(a) <= key(b)):
+            yield a
+            a = await advance(first)
+        else:
+            yield b
+            b = await advance(second)
+
+
+class OrderArchiver:
+    """Runs archive_orders every ORDER_ARCHIVE_INTERVAL_SECONDS (0 disables it)"""
+
+    def __init__(self):
+        self.interval = float(os.environ.get('ORDER_ARCHIVE_INTERVAL_SECONDS', '21600'))
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, db):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, db):
+        while True:
+            try:
+                moved = await archive_orders(db)
+                if moved:
+                    logger.info(f"Archived {moved} finished orders")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Order archiving failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+# Global order archiver
+order_archiver = OrderArchiver()
@@ -0,0 +1,144 @@
+import asyncio
+import itertools
+import os
+from typing import AsyncIterator, Callable, List, Optional, Set
+import orjson
+from services.serialization import order_document
+import logging
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = "order_created"
+ORDER_STATUS_CHANGED = "order_status_changed"
+ORDER_DELETED = "order_deleted"
+
+# Comment line sent while idle so proxies do not close the connection
+KEEP_ALIVE = b": keep-alive\n\n"
+
+
+class _Subscriber:
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # Set when the client fell too far behind; it has to reconnect and reload
+        self.dropped = False
+
+
+class OrderEventBroadcaster:
+    """Fans order writes out to every open /admin/orders/stream connection.
+
+    Events are published by the process that made the write. With several
+    worker processes set ORDER_EVENTS_SOURCE=change_stream (needs a replica
+    set) so every worker follows the orders collection instead.
+    """
+
+    def __init__(self):
+        self.source = os.environ.get('ORDER_EVENTS_SOURCE', 'local')
+        self.queue_size = int(os.environ.get('ORDER_STREAM_QUEUE_SIZE', '100'))
+        self.keep_alive_seconds = float(os.environ.get('ORDER_STREAM_KEEPALIVE_SECONDS', '15'))
+        self._subscribers: Set[_Subscriber] = set()
+        self._ids = itertools.count(1)
+        self._watch_task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[dict], None]] = []
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def add_listener(self, listener: Callable[[dict], None]):
+        """Call listener(payload) for every event, in process, before it is streamed"""
+        self._listeners.append(listener)
+
+    def _broadcast(self, event_type: str, payload: dict):
+        for listener in self._listeners:
+            try:
+                listener(payload)
+            except Exception as e:
+                logger.error(f"Order event listener failed: {e}")
+
+        if not self._subscribers:
+            return
+        # Encode once, every subscriber gets the same bytes
+        data = orjson.dumps(payload).decode("utf-8")
+        message = f"id: {next(self._ids)}\nevent: {event_type}\ndata: {data}\n\n".encode("utf-8")
+
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                subscriber.dropped = True
+                self._subscribers.discard(subscriber)
+                logger.warning("Dropped a slow order stream subscriber")
+
+    def publish(self, event_type: str, order: dict):
+        """Announce an order write made by this process"""
+        if self.source == "local":
+            self._broadcast(event_type, {"type": event_type, "order": order_document(order)})
+
+    def publish_deleted(self, order_id: str):
+        if self.source == "local":
+            self._broadcast(ORDER_DELETED, {"type": ORDER_DELETED, "order_id": order_id})
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """SSE byte stream for one client, ends when the client disconnects"""
+        subscriber = _Subscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        try:
+            # Reconnect quickly after a dropped connection
+            yield b"retry: 2000\n\n"
+            while True:
+                if subscriber.dropped and subscriber.queue.empty():
+                    return
+                try:
+                    yield await asyncio.wait_for(subscriber.queue.get(), timeout=self.keep_alive_seconds)
+                except asyncio.TimeoutError:
+                    yield KEEP_ALIVE
+        finally:
+            self._subscribers.discard(subscriber)
+
+    # === Change stream source ===
+    def start(self, db):
+        if self.source == "change_stream" and self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch(db))
+
+    async def stop(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    async def _watch(self, db):
+        pipeline = [{"$match": {"$or": [
+            {"operationType": {"$in": ["insert", "delete"]}},
+            {"operationType": "update", "updateDescription.updatedFields.status": {"$exists": True}},
+        ]}}]
+        resume_token = None
+        while True:
+            try:
+                async with db.orders.watch(
+                    pipeline, full_document="updateLookup", resume_after=resume_token
+                ) as change_stream:
+                    async for change in change_stream:
+                        resume_token = change_stream.resume_token
+                        self._broadcast_change(change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Order change stream failed, retrying: {e}")
+                await asyncio.sleep(5)
+
+    def _broadcast_change(self, change: dict):
+        operation = change["operationType"]
+        if operation == "delete":
+            # Only the _id survives a delete, which is what the API exposes as id
+            order_id = str(change["documentKey"]["_id"])
+            self._broadcast(ORDER_DELETED, {"type": ORDER_DELETED, "order_id": order_id})
+            return
+
+        order = change.get("fullDocument")
+        if order is None:
+            return
+        event_type = ORDER_CREATED if operation == "insert" else ORDER_STATUS_CHANGED
+        self._broadcast(event_type, {"type": event_type, "order": order_document(order)})
+
+
+# Global order event broadcaster
+order_events = OrderEventBroadcaster()
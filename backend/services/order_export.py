@@ -0,0 +1,115 @@
+import csv
+import io
+from typing import AsyncIterator
+import orjson
+from services.serialization import ORDER_PROJECTION, order_document
+from services.order_archive import ARCHIVE_COLLECTION, merge_streams
+
+# Documents fetched per round trip; large enough to keep the cursor busy,
+# small enough that memory stays flat for any date range
+EXPORT_BATCH_SIZE = 500
+
+ORDER_COLUMNS = [
+    "order_number", "id", "created_at", "pickup_time", "status",
+    "customer_name", "customer_phone", "customer_notes", "item_count", "total",
+]
+
+# Spreadsheets evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+ITEM_COLUMNS = [
+    "order_number", "id", "created_at", "status",
+    "menu_item_id", "name", "price", "quantity", "line_total",
+]
+
+
+def _csv_cell(value):
+    """Neutralize text that a spreadsheet would run as a formula (e.g. a customer name "=HYPERLINK(...)")"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _order_row(order: dict) -> dict:
+    customer = order.get("customer") or {}
+    return {
+        "order_number": order["order_number"],
+        "id": order["id"],
+        "created_at": order["created_at"],
+        "pickup_time": order["pickup_time"],
+        "status": order["status"],
+        "customer_name": customer.get("name"),
+        "customer_phone": customer.get("phone"),
+        "customer_notes": customer.get("notes"),
+        "item_count": sum(item["quantity"] for item in order.get("items") or []),
+        "total": order["total"],
+    }
+
+
+def _item_rows(order: dict):
+    for item in order.get("items") or []:
+        yield {
+            "order_number": order["order_number"],
+            "id": order["id"],
+            "created_at": order["created_at"],
+            "status": order["status"],
+            "menu_item_id": item["menu_item_id"],
+            "name": item["name"],
+            "price": item["price"],
+            "quantity": item["quantity"],
+            "line_total": round(item["price"] * item["quantity"], 2),
+        }
+
+
+async def _cursor(collection, query: dict) -> AsyncIterator[dict]:
+    cursor = collection.find(query, ORDER_PROJECTION, batch_size=EXPORT_BATCH_SIZE)
+    # Oldest first, walking the (created_at, id) index backwards
+    cursor = cursor.sort([("created_at", 1), ("id", 1)])
+    async for doc in cursor:
+        yield doc
+
+
+async def _orders(db, query: dict, include_archive: bool) -> AsyncIterator[dict]:
+    docs = _cursor(db.orders, query)
+    if include_archive:
+        docs = merge_streams(
+            docs, _cursor(db[ARCHIVE_COLLECTION], query),
+            key=lambda doc: (doc["created_at"], doc.get("id"))
+        )
+    async for doc in docs:
+        yield order_document(doc)
+
+
+async def export_ndjson(
+    db, query: dict, per_item: bool = False, include_archive: bool = False
+) -> AsyncIterator[bytes]:
+    """One JSON object per line: an order, or one line item with its order keys"""
+    async for order in _orders(db, query, include_archive):
+        if per_item:
+            for row in _item_rows(order):
+                yield orjson.dumps(row) + b"\n"
+        else:
+            yield orjson.dumps(order) + b"\n"
+
+
+async def export_csv(
+    db, query: dict, per_item: bool = False, include_archive: bool = False
+) -> AsyncIterator[bytes]:
+    """CSV with a header row: one row per order, or one per line item"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=ITEM_COLUMNS if per_item else ORDER_COLUMNS)
+
+    def flush() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+        return data
+
+    writer.writeheader()
+    yield flush()
+
+    async for order in _orders(db, query, include_archive):
+        rows = _item_rows(order) if per_item else [_order_row(order)]
+        for row in rows:
+            writer.writerow({column: _csv_cell(value) for column, value in row.items()})
+        yield flush()
@@ -0,0 +1,128 @@
+import os
+import re
+import unicodedata
+from typing import List
+from pymongo import UpdateOne
+from services.order_archive import ARCHIVE_COLLECTION
+
+# Shortest digit run treated as a phone number fragment
+MIN_PHONE_DIGITS = 3
+
+
+def default_country_code() -> str:
+    """Country code assumed for numbers typed in national format (0791234567)"""
+    return os.environ.get('PHONE_DEFAULT_COUNTRY_CODE', '41')
+
+
+def fold(text: str) -> str:
+    """Case- and accent-fold text, so "Müller" and "MULLER" both become "muller" """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def name_tokens(name: str) -> List[str]:
+    return re.findall(r"\w+", fold(name))
+
+
+def phone_digits(phone: str) -> str:
+    # "+41 (0)79 ..." marks the trunk 0 that is dropped after a country code
+    return re.sub(r"\D", "", re.sub(r"\(\s*0\s*\)", "", phone))
+
+
+def normalize_phone(phone: str) -> str:
+    """E.164-style key: "+41 79 123 45 67", "+41 (0)79 123 45 67", "0041791234567"
+    and "079 123 45 67" agree"""
+    digits = phone_digits(phone)
+    if phone.strip().startswith("+"):
+        return "+" + digits
+    if digits.startswith("00"):
+        return "+" + digits[2:]
+    if digits.startswith("0"):
+        return "+" + default_country_code() + digits[1:]
+    return "+" + digits
+
+
+def search_keys(customer: dict) -> dict:
+    """Normalized keys stored with every order under "search" for indexed lookups"""
+    digits = phone_digits(customer["phone"])
+    return {
+        "name_tokens": name_tokens(customer["name"]),
+        "phone": normalize_phone(customer["phone"]),
+        # Reversed so that a prefix lookup matches the end of the number,
+        # whichever country or trunk prefix it was typed with
+        "phone_rev": digits[::-1],
+    }
+
+
+def _prefix(value: str) -> dict:
+    return {"$regex": "^" + re.escape(value)}
+
+
+def phone_prefixes(fragment: str) -> List[str]:
+    """E.164 prefixes a typed phone fragment can stand for.
+
+    With a "+", "00" or trunk "0" it is normalized like a stored number
+    ("079 123" becomes "+4179123"). Bare digits may be a national number
+    without its 0 or an international one without its "+", so both are tried.
+    """
+    normalized = normalize_phone(fragment)
+    digits = phone_digits(fragment)
+    if fragment.startswith("+") or digits.startswith("0"):
+        return [normalized]
+    return [normalized, "+" + default_country_code() + digits]
+
+
+def search_query(q: str) -> dict:
+    """Mongo filter whose every branch is an anchored prefix on an indexed field"""
+    q = q.strip()
+    clauses = [{"order_number": _prefix(q.upper())}]
+
+    # Digits belong to the phone number, never to the name
+    words = [token for token in name_tokens(q) if not token.isdigit()]
+    # Every typed word has to start one of the customer's name tokens
+    name_clause = {"$and": [{"search.name_tokens": _prefix(word)} for word in words]} if words else None
+
+    # The digits typed after the name, e.g. "müller 079 123"
+    fragment = re.search(r"\+?\d[\d\s()./-]*", q)
+    digits = phone_digits(fragment.group()) if fragment else ""
+    phone_clause = None
+    if len(digits) >= MIN_PHONE_DIGITS:
+        phone_clause = {"$or": [
+            *({"search.phone": _prefix(prefix)} for prefix in phone_prefixes(fragment.group().strip())),
+            {"search.phone_rev": _prefix(digits[::-1])},
+        ]}
+
+    if name_clause and phone_clause:
+        # "müller 079 123" means that Müller with that number, not either of them
+        clauses.append({"$and": name_clause["$and"] + [phone_clause]})
+    elif name_clause or phone_clause:
+        clauses.append(name_clause or phone_clause)
+
+    return {"$or": clauses}
+
+
+async def backfill_search_keys(db, batch_size: int = 500) -> int:
+    """Add or refresh the search keys and phone key of every order.
+
+    Orders whose stored keys already match what the current normalization
+    produces are left alone, so this can be rerun after normalize_phone or
+    search_keys change. Archived orders are refreshed too.
+    """
+    updated = 0
+    for collection in (db.orders, db[ARCHIVE_COLLECTION]):
+        cursor = collection.find({}, {"_id": 1, "customer": 1, "search": 1, "phone_key": 1})
+        batch = []
+        async for order in cursor:
+            keys = {
+                "search": search_keys(order["customer"]),
+                "phone_key": normalize_phone(order["customer"]["phone"])
+            }
+            if all(order.get(field) == value for field, value in keys.items()):
+                continue
+            batch.append(UpdateOne({"_id": order["_id"]}, {"$set": keys}))
+            if len(batch) >= batch_size:
+                updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+                batch = []
+        if batch:
+            updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+    return updated
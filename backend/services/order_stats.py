@@ -0,0 +1,289 @@
+import os
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from pymongo import UpdateOne
+from models import ACTIVE_ORDER_STATUSES, OrderStatus
+from services.active_orders import active_orders
+import logging
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUS_VALUES = [status.value for status in ACTIVE_ORDER_STATUSES]
+
+# Cancelled orders keep their order and status counts but are not sales
+CANCELLED = OrderStatus.CANCELLED.value
+
+# daily_stats holds one document per day plus this running active-order count
+ACTIVE_COUNTER_ID = "active"
+
+
+def stats_timezone() -> ZoneInfo:
+    """Days and hours of the rollups follow the restaurant's wall clock"""
+    return ZoneInfo(os.environ.get('STATS_TIMEZONE', 'Europe/Zurich'))
+
+
+def local_time(moment: datetime) -> datetime:
+    """Naive UTC timestamp (as stored in created_at) in the stats timezone"""
+    return moment.replace(tzinfo=timezone.utc).astimezone(stats_timezone())
+
+
+def local_now() -> datetime:
+    return datetime.now(stats_timezone())
+
+
+def utc_time(moment: datetime) -> datetime:
+    """Naive local wall-clock time as the naive UTC timestamp created_at is compared with"""
+    return moment.replace(tzinfo=stats_timezone()).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def local_day_window(day: datetime) -> Tuple[datetime, datetime]:
+    """[start, end) of the local calendar day of `day` as naive UTC bounds for created_at"""
+    midnight = day.replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+    return utc_time(midnight), utc_time(midnight + timedelta(days=1))
+
+
+def stats_day(day: datetime) -> str:
+    """Rollup key of a local calendar day"""
+    return day.strftime("%Y-%m-%d")
+
+
+def order_day(created_at: datetime) -> str:
+    """Rollup key for the local day an order was created on"""
+    return stats_day(local_time(created_at))
+
+
+def _hour(created_at: datetime) -> str:
+    return f"{local_time(created_at).hour:02d}"
+
+
+def _item_increments(items: list, sign: int = 1) -> dict:
+    """$inc fields for the per-dish buckets of one order"""
+    increments = {}
+    for item in items:
+        key = f"items.{item['menu_item_id']}"
+        increments[f"{key}.quantity"] = increments.get(f"{key}.quantity", 0) + sign * item["quantity"]
+        increments[f"{key}.revenue"] = round(
+            increments.get(f"{key}.revenue", 0) + sign * item["price"] * item["quantity"], 2
+        )
+    return increments
+
+
+def _sales_increments(order: dict, sign: int) -> dict:
+    """$inc fields for the revenue and dishes one order contributes"""
+    hour = _hour(order["created_at"])
+    return {
+        "revenue": sign * order["total"],
+        f"hours.{hour}.revenue": sign * order["total"],
+        **_item_increments(order["items"], sign),
+    }
+
+
+def _order_increments(order: dict, sign: int) -> dict:
+    """$inc fields that add (sign=1) or remove (sign=-1) one order from its day"""
+    status = OrderStatus(order["status"]).value
+    increments = {
+        "orders": sign,
+        f"status_counts.{status}": sign,
+        f"hours.{_hour(order['created_at'])}.orders": sign,
+    }
+    if status != CANCELLED:
+        increments.update(_sales_increments(order, sign))
+    return increments
+
+
+def status_change_increments(order: dict, old_status: str, new_status: str) -> dict:
+    """$inc fields that move an order between status buckets, and in or out
+    of the sales when it is cancelled"""
+    increments = {f"status_counts.{old_status}": -1, f"status_counts.{new_status}": 1}
+    if (old_status == CANCELLED) != (new_status == CANCELLED):
+        increments.update(_sales_increments(order, -1 if new_status == CANCELLED else 1))
+    return increments
+
+
+async def _update_active_counter(db, order: dict, delta: int):
+    if OrderStatus(order["status"]).value in ACTIVE_STATUS_VALUES:
+        await db.daily_stats.update_one(
+            {"_id": ACTIVE_COUNTER_ID}, {"$inc": {"count": delta}}, upsert=True
+        )
+
+
+async def record_order_created(db, order: dict):
+    """Count a new order in its day's rollup and in the active counter"""
+    created_at = order["created_at"]
+    try:
+        await db.daily_stats.update_one(
+            {"_id": order_day(created_at)},
+            {
+                "$inc": _order_increments(order, 1),
+                "$set": {
+                    **{f"items.{item['menu_item_id']}.name": item["name"] for item in order["items"]},
+                    "updated_at": datetime.utcnow()
+                },
+            },
+            upsert=True
+        )
+        await _update_active_counter(db, order, 1)
+    except Exception as e:
+        # The order itself is stored; reconcile_stats.py repairs the rollup
+        logger.warning(f"Could not update daily stats for new order: {e}")
+
+
+async def record_order_deleted(db, order: dict):
+    """Take a deleted order back out of its day's rollup and the active counter"""
+    try:
+        await db.daily_stats.update_one(
+            {"_id": order_day(order["created_at"])},
+            {
+                "$inc": _order_increments(order, -1),
+                "$set": {"updated_at": datetime.utcnow()},
+            }
+        )
+        await _update_active_counter(db, order, -1)
+    except Exception as e:
+        logger.warning(f"Could not update daily stats for deleted order: {e}")
+
+
+async def record_status_change(db, order: dict, old_status: str, new_status: Optional[str] = None):
+    """Move an order between status buckets of the day it was created on"""
+    await record_status_changes(db, [(order, old_status, new_status or order["status"])])
+
+
+async def record_status_changes(db, changes: List[Tuple[dict, str, str]]):
+    """Record (order, old_status, new_status) changes with one bulk write.
+
+    Increments are summed per day first, so a batch costs one round trip
+    however many orders and days it touches.
+    """
+    per_day = defaultdict(Counter)
+    active_delta = 0
+    for order, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        per_day[order_day(order["created_at"])].update(status_change_increments(order, old_status, new_status))
+        active_delta += (new_status in ACTIVE_STATUS_VALUES) - (old_status in ACTIVE_STATUS_VALUES)
+
+    now = datetime.utcnow()
+    requests = []
+    for day, increments in per_day.items():
+        increments = {field: round(value, 2) for field, value in increments.items() if round(value, 2)}
+        if increments:
+            requests.append(UpdateOne(
+                {"_id": day}, {"$inc": increments, "$set": {"updated_at": now}}, upsert=True
+            ))
+    if active_delta:
+        requests.append(UpdateOne({"_id": ACTIVE_COUNTER_ID}, {"$inc": {"count": active_delta}}, upsert=True))
+    if not requests:
+        return
+
+    try:
+        await db.daily_stats.bulk_write(requests, ordered=False)
+    except Exception as e:
+        logger.warning(f"Could not update daily stats for status change: {e}")
+
+
+async def get_daily_stats(db, day: datetime) -> dict:
+    """Dashboard statistics for one local day, read from the rollup in one query"""
+    day_key = stats_day(day)
+    docs = {}
+    async for doc in db.daily_stats.find({"_id": {"$in": [day_key, ACTIVE_COUNTER_ID]}}):
+        docs[doc["_id"]] = doc
+
+    today = docs.get(day_key, {})
+    status_counts = {status: count for status, count in today.get("status_counts", {}).items() if count}
+
+    return {
+        "today": {
+            "orders": today.get("orders", 0),
+            "revenue": round(today.get("revenue", 0), 2)
+        },
+        "status_counts": status_counts,
+        "hours": {
+            hour: {"orders": bucket.get("orders", 0), "revenue": round(bucket.get("revenue", 0), 2)}
+            for hour, bucket in sorted(today.get("hours", {}).items())
+        },
+        "pending_orders": (
+            len(active_orders) if active_orders.loaded
+            else docs.get(ACTIVE_COUNTER_ID, {}).get("count", 0)
+        ),
+        "timezone": stats_timezone().key,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+async def rebuild_daily_stats(db, date_from: datetime, date_to: Optional[datetime] = None) -> int:
+    """Recompute rollups for whole local days in [date_from, date_to) and the active counter"""
+    midnight = {"hour": 0, "minute": 0, "second": 0, "microsecond": 0}
+    date_from = date_from.replace(**midnight)
+    date_to = (date_to or local_now().replace(tzinfo=None) + timedelta(days=1)).replace(**midnight)
+    match = {"$match": {"created_at": {"$gte": utc_time(date_from), "$lt": utc_time(date_to)}}}
+    tz = stats_timezone().key
+    local_day = {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at", "timezone": tz}}
+    pipeline = [
+        match,
+        # Archived orders still count towards their day
+        {"$unionWith": {"coll": "orders_archive", "pipeline": [match]}},
+        {"$group": {
+            "_id": {
+                "day": local_day,
+                "hour": {"$hour": {"date": "$created_at", "timezone": tz}},
+                "status": "$status",
+            },
+            "orders": {"$sum": 1},
+            "revenue": {"$sum": "$total"},
+        }},
+    ]
+
+    items_pipeline = [
+        match,
+        {"$unionWith": {"coll": "orders_archive", "pipeline": [match]}},
+        {"$match": {"status": {"$ne": CANCELLED}}},
+        {"$unwind": "$items"},
+        {"$group": {
+            "_id": {
+                "day": local_day,
+                "menu_item_id": "$items.menu_item_id",
+            },
+            "name": {"$last": "$items.name"},
+            "quantity": {"$sum": "$items.quantity"},
+            "revenue": {"$sum": {"$multiply": ["$items.price", "$items.quantity"]}},
+        }},
+    ]
+
+    days = defaultdict(lambda: {
+        "orders": 0, "revenue": 0.0, "status_counts": defaultdict(int), "hours": {}, "items": {}
+    })
+    async for row in db.orders.aggregate(pipeline):
+        doc = days[row["_id"]["day"]]
+        hour = f"{row['_id']['hour']:02d}"
+        bucket = doc["hours"].setdefault(hour, {"orders": 0, "revenue": 0.0})
+
+        doc["orders"] += row["orders"]
+        doc["status_counts"][row["_id"]["status"]] += row["orders"]
+        bucket["orders"] += row["orders"]
+        if row["_id"]["status"] != CANCELLED:
+            doc["revenue"] += row["revenue"]
+            bucket["revenue"] += row["revenue"]
+
+    async for row in db.orders.aggregate(items_pipeline):
+        days[row["_id"]["day"]]["items"][row["_id"]["menu_item_id"]] = {
+            "name": row["name"],
+            "quantity": row["quantity"],
+            "revenue": round(row["revenue"], 2),
+        }
+
+    # Days without any orders must not keep stale rollups
+    await db.daily_stats.delete_many({
+        "_id": {"$gte": stats_day(date_from), "$lt": stats_day(date_to), "$nin": list(days)}
+    })
+    now = datetime.utcnow()
+    for day, doc in days.items():
+        doc["status_counts"] = dict(doc["status_counts"])
+        doc["updated_at"] = now
+        await db.daily_stats.replace_one({"_id": day}, doc, upsert=True)
+
+    active = await db.orders.count_documents({"status": {"$in": ACTIVE_STATUS_VALUES}})
+    await db.daily_stats.replace_one({"_id": ACTIVE_COUNTER_ID}, {"count": active}, upsert=True)
+
+    return len(days)
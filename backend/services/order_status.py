@@ -0,0 +1,121 @@
+import uuid
+from datetime import datetime
+from typing import List, Optional
+from pymongo import ReturnDocument, UpdateOne
+from models import OrderStatus, OrderStatusBatchItem, allowed_previous_statuses
+from services.order_stats import record_status_change, record_status_changes
+from services.order_events import order_events, ORDER_STATUS_CHANGED
+
+
+# Recent status changes kept on each order, enough to outlive concurrent screens
+STATUS_CHANGE_LOG_SIZE = 10
+
+
+def _status_update(new_status: OrderStatus, now: datetime, token: Optional[str] = None) -> list:
+    """Pipeline update that keeps the replaced status for the rollups.
+    
+    Every change is also appended to a short status_changes log under a
+    token, so a batch can tell which of its updates applied even if
+    another screen changed the order again right after.
+    """
+    change = {"token": token or str(uuid.uuid4()), "from": "$status", "to": new_status.value}
+    return [{"$set": {
+        "previous_status": "$status",
+        "status": new_status.value,
+        "updated_at": now,
+        "status_changes": {"$slice": [
+            {"$concatArrays": [{"$ifNull": ["$status_changes", []]}, [change]]},
+            -STATUS_CHANGE_LOG_SIZE
+        ]}
+    }}]
+
+
+class StatusTransitionError(Exception):
+    """The order exists but may not move to the requested status"""
+
+    def __init__(self, current_status: str, new_status: OrderStatus):
+        self.current_status = current_status
+        self.new_status = new_status
+        super().__init__(
+            f"Cannot change order status from '{current_status}' to '{new_status.value}'"
+        )
+
+
+async def change_order_status(db, order_id: str, new_status: OrderStatus) -> Optional[dict]:
+    """Apply a status change in one conditional find_one_and_update.
+    
+    The allowed previous statuses are part of the filter, so two screens
+    updating the same order cannot both win. Returns the updated document,
+    or None if the order does not exist.
+    """
+    previous = [status.value for status in allowed_previous_statuses(new_status)]
+    
+    order = await db.orders.find_one_and_update(
+        {"id": order_id, "status": {"$in": previous}},
+        _status_update(new_status, datetime.utcnow()),
+        return_document=ReturnDocument.AFTER
+    )
+    if order:
+        await record_status_change(db, order, order["previous_status"])
+        order_events.publish(ORDER_STATUS_CHANGED, order)
+        return order
+    
+    # Slow path, only taken on failure: tell "missing" apart from "not allowed"
+    current = await db.orders.find_one({"id": order_id}, {"status": 1})
+    if not current:
+        return None
+    raise StatusTransitionError(current["status"], new_status)
+
+
+async def change_order_statuses(db, updates: List[OrderStatusBatchItem]) -> List[dict]:
+    """Apply several status changes with one unordered bulk write.
+    
+    Every update carries its own transition rule in the filter. The orders
+    are read back with one query; an update applied if the order's
+    status_changes log holds this batch's token.
+    """
+    now = datetime.utcnow()
+    token = str(uuid.uuid4())
+    
+    await db.orders.bulk_write([
+        UpdateOne(
+            {
+                "id": update.order_id,
+                "status": {"$in": [status.value for status in allowed_previous_statuses(update.status)]}
+            },
+            _status_update(update.status, now, token)
+        )
+        for update in updates
+    ], ordered=False)
+    
+    orders = {}
+    async for order in db.orders.find({"id": {"$in": [update.order_id for update in updates]}}):
+        orders[order["id"]] = order
+    
+    results = []
+    changes = []
+    for update in updates:
+        order = orders.get(update.order_id)
+        result = {"order_id": update.order_id, "status": update.status, "success": False}
+        
+        change = next(
+            (change for change in (order or {}).get("status_changes", []) if change["token"] == token),
+            None
+        )
+        
+        if order is None:
+            result["error"] = "Order not found"
+        elif change is not None:
+            result["success"] = True
+            result["order"] = order
+            # The order may have moved on since; record exactly the change this batch made
+            changes.append((order, change["from"], change["to"]))
+            order_events.publish(ORDER_STATUS_CHANGED, order)
+        else:
+            result["error"] = str(StatusTransitionError(order["status"], update.status))
+        
+        results.append(result)
+    
+    # One write for the rollups of the whole batch
+    await record_status_changes(db, changes)
+    return results
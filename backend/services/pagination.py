@@ -0,0 +1,54 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: datetime, doc_id: str) -> str:
+    """Opaque cursor for the position right after (sort_value, doc_id)"""
+    raw = json.dumps([sort_value.isoformat(), doc_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of encode_cursor, raises ValueError for malformed cursors"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(sort_value), str(doc_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def keyset_filter(field: str, cursor: str, descending: bool = True) -> dict:
+    """Mongo filter for documents after the cursor in (field, id) order"""
+    sort_value, doc_id = decode_cursor(cursor)
+    op = "$lt" if descending else "$gt"
+    return {
+        "$or": [
+            {field: {op: sort_value}},
+            {field: sort_value, "id": {op: doc_id}},
+        ]
+    }
+
+
+def with_keyset(query: dict, field: str, cursor: Optional[str], descending: bool = True) -> dict:
+    """Combine an existing filter with the keyset condition for a cursor"""
+    if not cursor:
+        return query
+    keyset = keyset_filter(field, cursor, descending)
+    return {"$and": [query, keyset]} if query else keyset
+
+
+def keyset_sort(field: str, descending: bool = True) -> list:
+    direction = -1 if descending else 1
+    return [(field, direction), ("id", direction)]
+
+
+def set_next_cursor(response, last_key: Optional[Tuple[datetime, str]], page_size: int, limit: int):
+    """Advertise the next page only when this one came back full"""
+    if last_key is not None and page_size >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*last_key)
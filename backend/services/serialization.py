@@ -0,0 +1,28 @@
+from typing import List
+from fastapi.responses import ORJSONResponse
+
+# Public fields of models.Order; anything else stored on an order stays internal
+ORDER_FIELDS = (
+    "id", "items", "customer", "pickup_time", "total",
+    "status", "order_number", "created_at", "updated_at",
+)
+
+# Only fetch what the response needs (plus _id for the id conversion)
+ORDER_PROJECTION = {field: 1 for field in ORDER_FIELDS}
+
+
+def order_document(doc: dict) -> dict:
+    """Shape a stored order like models.Order without re-running its validators.
+    
+    Orders are validated once, when they are written; documents read back
+    from our own collection are trusted.
+    """
+    order = {field: doc.get(field) for field in ORDER_FIELDS}
+    # Convert MongoDB _id to id
+    order["id"] = str(doc.get("_id", doc.get("id")))
+    return order
+
+
+def orders_response(orders: List[dict]) -> ORJSONResponse:
+    """Encode trusted order dicts with orjson, bypassing response_model validation"""
+    return ORJSONResponse(orders)
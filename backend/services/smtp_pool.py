@@ -0,0 +1,100 @@
+import asyncio
+import time
+from email.message import Message
+from typing import List, Optional, Tuple
+import aiosmtplib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Failures that mean a pooled connection went stale, worth one retry on a new one
+_STALE_CONNECTION_ERRORS = (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPTimeoutError, ConnectionError)
+
+
+class SMTPConnectionPool:
+    """A few authenticated SMTP connections, reused across messages.
+
+    Connections are opened on demand up to `size`, kept after each message
+    and replaced when the server dropped them or they sat idle longer than
+    `max_idle` seconds (most servers close idle sessions after a minute or
+    two). Works against a local stand-in such as
+    `python -m aiosmtpd -n -l localhost:8025` with starttls off and no
+    credentials.
+    """
+
+    def __init__(
+        self, hostname: str, port: int, username: str = "", password: str = "",
+        size: int = 2, timeout: float = 10, use_tls: bool = False, starttls: bool = True,
+        max_idle: float = 60
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.timeout = timeout
+        self.use_tls = use_tls
+        self.starttls = starttls
+        self.max_idle = max_idle
+        self._idle: List[Tuple[aiosmtplib.SMTP, float]] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname, port=self.port, timeout=self.timeout,
+            use_tls=self.use_tls, start_tls=False
+        )
+        await client.connect()
+        try:
+            if self.starttls and not self.use_tls:
+                await client.starttls()
+            if self.username:
+                await client.login(self.username, self.password)
+        except Exception:
+            client.close()
+            raise
+        return client
+
+    async def _checkout(self) -> aiosmtplib.SMTP:
+        while self._idle:
+            client, last_used = self._idle.pop()
+            if client.is_connected and time.monotonic() - last_used < self.max_idle:
+                return client
+            await self._discard(client)
+        return await self._connect()
+
+    async def _discard(self, client: aiosmtplib.SMTP):
+        try:
+            if client.is_connected:
+                await client.quit()
+        except Exception:
+            client.close()
+
+    async def send(self, message: Message):
+        """Send one message, retrying once on a fresh connection if the pooled one was stale"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+
+        async with self._slots:
+            client = await self._checkout()
+            try:
+                await client.send_message(message)
+            except _STALE_CONNECTION_ERRORS as e:
+                logger.info(f"SMTP connection dropped, reconnecting: {e}")
+                client.close()
+                client = await self._connect()
+                try:
+                    await client.send_message(message)
+                except Exception:
+                    await self._discard(client)
+                    raise
+            except Exception:
+                # Unknown session state after e.g. a refused recipient
+                await self._discard(client)
+                raise
+            self._idle.append((client, time.monotonic()))
+
+    async def close(self):
+        while self._idle:
+            client, _ = self._idle.pop()
+            await self._discard(client)
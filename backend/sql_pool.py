@@ -0,0 +1,79 @@
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+import os
+
+
+class _MeteredPoolMixin:
+    """Adds waiting / created / timed out counters to a QueuePool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiting = 0
+        self.created = 0
+        self.timed_out = 0
+
+    def _do_get(self):
+        self.waiting += 1
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timed_out += 1
+            raise
+        finally:
+            self.waiting -= 1
+
+    def _create_connection(self):
+        self.created += 1
+        return super()._create_connection()
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def sql_pool_options(url: str, use_async: bool = False) -> dict:
+    """create_engine pool arguments, overridable from the environment"""
+    options = {
+        # Detect connections dropped by Postgres restarts or firewalls
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+    }
+
+    # SQLite keeps SQLAlchemy's own pool choice for file / memory databases
+    if url.startswith("sqlite"):
+        return options
+
+    options.update({
+        "poolclass": MeteredAsyncQueuePool if use_async else MeteredQueuePool,
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT", "30")),
+    })
+    return options
+
+
+def sql_pool_stats(engine) -> dict:
+    """Live pool numbers for a sync or async engine"""
+    pool = getattr(engine, "sync_engine", engine).pool
+    stats = {"status": pool.status()}
+
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        })
+
+    if isinstance(pool, _MeteredPoolMixin):
+        stats.update({
+            "waiting": pool.waiting,
+            "created": pool.created,
+            "timed_out": pool.timed_out,
+        })
+
+    return stats
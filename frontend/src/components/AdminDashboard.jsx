@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
 import { Button } from './ui/button';
 import { Badge } from './ui/badge';
@@ -12,6 +12,11 @@ const AdminDashboard = () => {
   const [stats, setStats] = useState(null);
   const [loading, setLoading] = useState(true);
   const [currentView, setCurrentView] = useState('pending');
+  const streamConnected = useRef(null);
+  const statsTimer = useRef(null);
+
+  // Statuses shown in the kitchen view, same as the backend's pending list
+  const activeStatuses = ['pending', 'confirmed', 'preparing'];
 
   // Order status configurations
   const statusConfig = {
@@ -23,30 +28,85 @@ const AdminDashboard = () => {
     cancelled: { label: 'Storniert', color: 'bg-red-500' }
   };
 
-  // Fetch initial data
+  // Fetch initial data, then follow the live order stream
   useEffect(() => {
     fetchDashboardData();
     
-    // Set up auto-refresh every 30 seconds
-    const interval = setInterval(fetchDashboardData, 30000);
+    const stream = adminAPI.openOrderStream();
+    
+    stream.onopen = () => {
+      // Catch up on anything missed while (re)connecting
+      if (streamConnected.current === false) fetchDashboardData();
+      streamConnected.current = true;
+    };
+    stream.onerror = () => {
+      streamConnected.current = false;
+    };
+    stream.addEventListener('order_created', (event) => applyOrderEvent(JSON.parse(event.data).order));
+    stream.addEventListener('order_status_changed', (event) => applyOrderEvent(JSON.parse(event.data).order));
+    stream.addEventListener('order_deleted', (event) => removeOrder(JSON.parse(event.data).order_id));
+    
+    // Poll only while the stream is down
+    const interval = setInterval(() => {
+      if (!streamConnected.current) fetchDashboardData();
+    }, 30000);
     
     return () => {
-      if (interval) clearInterval(interval);
+      stream.close();
+      clearInterval(interval);
+      clearTimeout(statsTimer.current);
     };
   }, []);
 
+  const isToday = (dateString) => {
+    return new Date(dateString).toDateString() === new Date().toDateString();
+  };
+
+  // Stats come from a cheap rollup read; batch bursts of events into one request
+  const refreshStats = () => {
+    clearTimeout(statsTimer.current);
+    statsTimer.current = setTimeout(async () => {
+      try {
+        setStats(await adminAPI.getOrderStats());
+      } catch (error) {
+        console.error('Error fetching order stats:', error);
+      }
+    }, 1000);
+  };
+
+  const upsertOrder = (list, order, newestFirst) => {
+    const others = list.filter(existing => existing.id !== order.id);
+    const merged = [...others, order];
+    merged.sort((a, b) => newestFirst
+      ? new Date(b.created_at) - new Date(a.created_at)
+      : new Date(a.created_at) - new Date(b.created_at));
+    return merged;
+  };
+
+  const applyOrderEvent = (order) => {
+    if (isToday(order.created_at)) {
+      setOrders(prev => upsertOrder(prev, order, true));
+    }
+    setPendingOrders(prev => activeStatuses.includes(order.status)
+      ? upsertOrder(prev, order, false)
+      : prev.filter(existing => existing.id !== order.id));
+    refreshStats();
+  };
+
+  const removeOrder = (orderId) => {
+    setOrders(prev => prev.filter(order => order.id !== orderId));
+    setPendingOrders(prev => prev.filter(order => order.id !== orderId));
+    refreshStats();
+  };
+
   const fetchDashboardData = async () => {
     try {
       setLoading(true);
-      const [ordersData, pendingData, statsData] = await Promise.all([
-        adminAPI.getTodaysOrders(),
-        adminAPI.getPendingOrders(),
-        adminAPI.getOrderStats()
-      ]);
+      const dashboard = await adminAPI.getDashboard();
       
-      setOrders(ordersData);
-      setPendingOrders(pendingData);
-      setStats(statsData);
+      setOrders(dashboard.today_orders);
+      setPendingOrders(dashboard.pending_orders);
+      setStats(dashboard.stats);
     } catch (error) {
       console.error('Error fetching dashboard data:', error);
       toast.error('Fehler beim Laden der Dashboard-Daten');
@@ -59,7 +119,8 @@ const AdminDashboard = () => {
     try {
       await adminAPI.updateOrderStatus(orderId, newStatus);
       toast.success('Bestellstatus erfolgreich aktualisiert');
-      fetchDashboardData(); // Refresh data
+      // The order stream delivers the change; refresh only without it
+      if (!streamConnected.current) fetchDashboardData();
     } catch (error) {
       console.error('Error updating order status:', error);
       toast.error('Fehler beim Aktualisieren des Bestellstatus');
@@ -106,8 +106,9 @@ export const ordersAPI = {
   },
 
   // Get customer orders
-  getCustomerOrders: async (phone) => {
-    const response = await api.get(`/orders/customer/${phone}`);
+  // params: { limit, cursor } - the next cursor is in the X-Next-Cursor header
+  getCustomerOrders: async (phone, params = {}) => {
+    const response = await api.get(`/orders/customer/${encodeURIComponent(phone)}`, { params });
     return response.data;
   }
 };
@@ -120,6 +121,12 @@ export const adminAPI = {
     return response.data;
   },
 
+  // Get today's orders, pending orders and stats in one request
+  getDashboard: async () => {
+    const response = await api.get('/admin/dashboard');
+    return response.data;
+  },
+
   // Get pending orders
   getPendingOrders: async () => {
     const response = await api.get('/admin/orders/pending');
@@ -138,12 +145,43 @@ export const adminAPI = {
     return response.data;
   },
 
+  // Update the status of several orders in one request
+  // updates: [{ order_id, status }, ...]
+  updateOrderStatuses: async (updates) => {
+    const response = await api.post('/admin/orders/status:batch', { updates });
+    return response.data;
+  },
+
   // Get order statistics
   getOrderStats: async () => {
     const response = await api.get('/admin/orders/stats');
     return response.data;
   },
 
+  // Get revenue per day, week or month
+  getRevenueAnalytics: async (params = {}) => {
+    const response = await api.get('/admin/analytics/revenue', { params });
+    return response.data;
+  },
+
+  // Get best-selling menu items (by: 'quantity' | 'revenue')
+  getTopItems: async (params = {}) => {
+    const response = await api.get('/admin/analytics/top-items', { params });
+    return response.data;
+  },
+
+  // Get order volume by weekday and hour
+  getOrderHeatmap: async (params = {}) => {
+    const response = await api.get('/admin/analytics/heatmap', { params });
+    return response.data;
+  },
+
+  // Open the live order event stream (Server-Sent Events)
+  // Events: order_created, order_status_changed, order_deleted
+  openOrderStream: () => {
+    return new EventSource(`${API_BASE}/admin/orders/stream`);
+  },
+
   // Search orders
   searchOrders: async (query, limit = 20) => {
     const response = await api.get('/admin/orders/search', { 
@@ -0,0 +1,57 @@
+"""A menu write must succeed even when the cache reload after it fails"""
+
+import asyncio
+from types import SimpleNamespace
+
+from models import MenuItemCreate
+from routes import menu
+from services.menu_cache import MenuCache
+
+ITEM = {
+    "category": "Hauptgerichte",
+    "name": "Pad Thai",
+    "description": "Reisnudeln mit Erdnüssen",
+    "price": 18.5,
+    "image": "pad-thai.jpg",
+}
+
+
+class MenuItems:
+    def __init__(self):
+        self.docs = []
+        self.reads_fail = False
+
+    async def insert_one(self, doc):
+        self.docs.append(doc)
+        return SimpleNamespace(inserted_id=doc["id"])
+
+    def find(self, query):
+        if self.reads_fail:
+            raise ConnectionError("database unavailable")
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield dict(doc)
+
+
+def test_failed_reload_does_not_fail_the_write(monkeypatch):
+    cache = MenuCache()
+    monkeypatch.setattr(menu, "menu_cache", cache)
+    db = SimpleNamespace(menu_items=MenuItems())
+
+    async def scenario():
+        await cache.load(db)
+        db.menu_items.reads_fail = True
+        created = await menu.create_menu_item(MenuItemCreate(**ITEM), db=db)
+
+        # Stored once, reported as created, and the old snapshot is expired
+        assert created.name == "Pad Thai"
+        assert len(db.menu_items.docs) == 1
+        assert cache._needs_reload()
+
+        db.menu_items.reads_fail = False
+        snapshot = await cache.get_snapshot(db)
+        assert [item.name for item in snapshot.items] == ["Pad Thai"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,82 @@
+"""Outbox entries whose order is not (yet) stored"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.notification_outbox import (
+    FAILED, ORDER_EMAIL, OUTBOX_COLLECTION, PENDING, SENDING, NotificationWorker,
+    insert_order_with_notifications,
+)
+
+
+class Collection:
+    def __init__(self, fail_inserts=False):
+        self.docs = []
+        self.updates = []
+        self.fail_inserts = fail_inserts
+
+    async def insert_many(self, docs):
+        for n, doc in enumerate(docs):
+            doc["_id"] = f"entry-{n}"
+        self.docs.extend(docs)
+
+    async def insert_one(self, doc):
+        if self.fail_inserts:
+            raise RuntimeError("duplicate key")
+        self.docs.append(doc)
+
+    async def delete_many(self, query):
+        ids = query["_id"]["$in"]
+        self.docs = [doc for doc in self.docs if doc["_id"] not in ids]
+
+    async def find_one(self, query, projection=None):
+        return None
+
+    async def update_one(self, query, update):
+        self.updates.append(update)
+
+
+class Database(dict):
+    def __init__(self, fail_inserts=False):
+        super().__init__({
+            "orders": Collection(fail_inserts), OUTBOX_COLLECTION: Collection(), "orders_archive": Collection()
+        })
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+def _claimed_entry(age: timedelta) -> dict:
+    created_at = datetime.utcnow() - age
+    return {
+        "_id": "entry-0", "kind": ORDER_EMAIL, "order_id": "order-1", "status": SENDING,
+        "attempts": 1, "created_at": created_at, "next_attempt_at": created_at,
+    }
+
+
+def test_missing_order_is_waited_for_without_using_an_attempt():
+    db = Database()
+    asyncio.run(NotificationWorker(db).deliver(_claimed_entry(timedelta(seconds=1))))
+
+    update, = db[OUTBOX_COLLECTION].updates
+    assert update["$set"]["status"] == PENDING
+    assert update["$inc"] == {"attempts": -1}
+    assert update["$set"]["next_attempt_at"] - datetime.utcnow() < timedelta(seconds=2)
+
+
+def test_order_still_missing_after_grace_is_given_up():
+    db = Database()
+    asyncio.run(NotificationWorker(db).deliver(_claimed_entry(timedelta(minutes=5))))
+
+    update, = db[OUTBOX_COLLECTION].updates
+    assert update["$set"]["status"] == FAILED
+    assert "$inc" not in update
+
+
+def test_failed_order_insert_removes_its_outbox_entries():
+    db = Database(fail_inserts=True)
+    with pytest.raises(RuntimeError):
+        asyncio.run(insert_order_with_notifications(db, {"id": "order-1"}))
+    assert db[OUTBOX_COLLECTION].docs == []
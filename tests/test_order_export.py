@@ -0,0 +1,67 @@
+"""CSV export cells that a spreadsheet would run as formulas"""
+
+import asyncio
+import csv
+import io
+from datetime import datetime
+
+import pytest
+
+from services.order_export import _csv_cell, export_csv
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("=HYPERLINK(\"http://evil\")", "'=HYPERLINK(\"http://evil\")"),
+    ("+41 79 123 45 67", "'+41 79 123 45 67"),
+    ("-1+1", "'-1+1"),
+    ("@SUM(A1)", "'@SUM(A1)"),
+    ("\t=1", "'\t=1"),
+    ("Hans Müller", "Hans Müller"),
+    ("TW-20240101-0001", "TW-20240101-0001"),
+    ("", ""),
+    (-12.5, -12.5),
+    (None, None),
+])
+def test_csv_cell(value, expected):
+    assert _csv_cell(value) == expected
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, sort):
+        return self
+
+    async def __aiter__(self):
+        for doc in self.docs:
+            yield doc
+
+
+class Orders:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None, batch_size=None):
+        return Cursor(self.docs)
+
+
+def test_export_escapes_customer_fields():
+    order = {
+        "id": "order-1", "order_number": "TW-20240101-0001", "status": "completed",
+        "created_at": datetime(2024, 1, 1, 12), "pickup_time": datetime(2024, 1, 1, 13),
+        "customer": {"name": "=cmd|' /C calc'!A0", "phone": "+41 79 123 45 67", "notes": None},
+        "items": [{"menu_item_id": "pad-thai", "name": "Pad Thai", "price": 18.5, "quantity": 1}],
+        "total": 18.5,
+    }
+
+    class Database:
+        orders = Orders([order])
+
+    async def collect():
+        return b"".join([chunk async for chunk in export_csv(Database(), {})]).decode("utf-8")
+
+    row, = csv.DictReader(io.StringIO(asyncio.run(collect())))
+    assert row["customer_name"] == "'=cmd|' /C calc'!A0"
+    assert row["customer_phone"] == "'+41 79 123 45 67"
+    assert row["total"] == "18.5"
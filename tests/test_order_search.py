@@ -0,0 +1,99 @@
+"""Admin search filters: names, phone fragments and both together"""
+
+import re
+
+import pytest
+
+from services.order_search import normalize_phone, search_keys, search_query
+
+
+def _value(doc: dict, path: str):
+    for part in path.split("."):
+        doc = doc.get(part, {}) if isinstance(doc, dict) else {}
+    return doc
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    """Just enough of Mongo's matcher for the filters search_query builds"""
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(_matches(doc, clause) for clause in condition):
+                return False
+        elif field == "$and":
+            if not all(_matches(doc, clause) for clause in condition):
+                return False
+        else:
+            value = _value(doc, field)
+            values = value if isinstance(value, list) else [value]
+            pattern = re.compile(condition["$regex"])
+            if not any(isinstance(v, str) and pattern.search(v) for v in values):
+                return False
+    return True
+
+
+def _order(order_number: str, name: str, phone: str) -> dict:
+    customer = {"name": name, "phone": phone}
+    return {"order_number": order_number, "customer": customer, "search": search_keys(customer)}
+
+
+ORDERS = [
+    _order("TW-20240101-0001", "Hans Müller", "+41 79 123 45 67"),
+    _order("TW-20240101-0002", "Anna Meier", "079 123 99 88"),
+    _order("TW-20240101-0003", "Peter Müller", "+41 76 555 44 33"),
+]
+
+
+def _search(q: str) -> list:
+    query = search_query(q)
+    return [order["order_number"][-4:] for order in ORDERS if _matches(order, query)]
+
+
+@pytest.mark.parametrize("q, expected", [
+    # Name only
+    ("müller", ["0001", "0003"]),
+    ("MULLER hans", ["0001"]),
+    ("mei", ["0002"]),
+    # Phone only, in national, international and suffix form
+    ("079 123", ["0001", "0002"]),
+    ("+41 79 123 45", ["0001"]),
+    ("45 67", ["0001"]),
+    # Name and phone fragment must both match
+    ("Müller 079 123", ["0001"]),
+    ("meier 079 123", ["0002"]),
+    ("müller 076", ["0003"]),
+    ("peter 079 123", []),
+    # Order number prefix
+    ("tw-20240101-0002", ["0002"]),
+])
+def test_search(q, expected):
+    assert _search(q) == expected
+
+
+def test_digits_are_not_name_tokens():
+    query = search_query("müller 079 123")
+    name_prefixes = [
+        clause["search.name_tokens"]["$regex"]
+        for branch in query["$or"] for clause in branch.get("$and", [])
+        if "search.name_tokens" in clause
+    ]
+    assert name_prefixes == ["^muller"]
+
+
+@pytest.mark.parametrize("phone", [
+    "+41 79 123 45 67",
+    "+41791234567",
+    "0041 79 123 45 67",
+    "0041791234567",
+    "079 123 45 67",
+    "079/123.45.67",
+    "+41 (0)79 123 45 67",
+    "+41 (0) 79 123 45 67",
+    "0041 (0)79 123 45 67",
+])
+def test_phone_formats_share_one_key(phone):
+    assert normalize_phone(phone) == "+41791234567"
+
+
+def test_foreign_numbers_keep_their_country_code():
+    assert normalize_phone("+49 (0)30 1234567") == "+49301234567"
+    assert normalize_phone("0049 30 1234567") == "+49301234567"
@@ -0,0 +1,95 @@
+"""daily_stats increments: cancelled orders keep their counts but leave the sales"""
+
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from services.order_stats import _order_increments, record_status_changes, status_change_increments
+
+ORDER = {
+    "created_at": datetime(2026, 7, 1, 10, 30),  # 12:30 in Zurich
+    "status": "pending",
+    "total": 31.5,
+    "items": [
+        {"menu_item_id": "pad-thai", "name": "Pad Thai", "price": 18.5, "quantity": 1},
+        {"menu_item_id": "spring-rolls", "name": "Frühlingsrollen", "price": 6.5, "quantity": 2},
+    ],
+}
+
+
+def _apply(*increments: dict) -> dict:
+    total = Counter()
+    for inc in increments:
+        total.update(inc)
+    return {field: round(value, 2) for field, value in total.items() if round(value, 2)}
+
+
+def test_new_order_counts_as_sale():
+    increments = _order_increments(ORDER, 1)
+    assert increments["revenue"] == 31.5
+    assert increments["hours.12.revenue"] == 31.5
+    assert increments["items.spring-rolls.quantity"] == 2
+    assert increments["items.spring-rolls.revenue"] == 13.0
+
+
+def test_cancelling_takes_order_out_of_sales():
+    after = _apply(_order_increments(ORDER, 1), status_change_increments(ORDER, "pending", "cancelled"))
+    assert after == {
+        "orders": 1,
+        "hours.12.orders": 1,
+        "status_counts.cancelled": 1,
+    }
+
+
+def test_rollup_of_cancelled_order_matches_incremental_writes():
+    cancelled = {**ORDER, "status": "cancelled"}
+    incremental = _apply(_order_increments(ORDER, 1), status_change_increments(ORDER, "pending", "cancelled"))
+    assert _apply(_order_increments(cancelled, 1)) == incremental
+
+
+def test_deleting_cancelled_order_leaves_nothing_behind():
+    cancelled = {**ORDER, "status": "cancelled"}
+    assert _apply(
+        _order_increments(ORDER, 1),
+        status_change_increments(ORDER, "pending", "cancelled"),
+        _order_increments(cancelled, -1),
+    ) == {}
+
+
+def test_other_changes_only_move_status_buckets():
+    assert status_change_increments(ORDER, "pending", "confirmed") == {
+        "status_counts.pending": -1,
+        "status_counts.confirmed": 1,
+    }
+
+
+class RecordingCollection:
+    def __init__(self):
+        self.bulk_writes = []
+
+    async def bulk_write(self, requests, ordered=True):
+        self.bulk_writes.append(requests)
+
+
+def test_batch_of_status_changes_is_one_bulk_write():
+    db = SimpleNamespace(daily_stats=RecordingCollection())
+    yesterday = {**ORDER, "created_at": ORDER["created_at"] - timedelta(days=1)}
+    changes = [(ORDER, "pending", "confirmed")] * 8 + [(ORDER, "pending", "cancelled"), (yesterday, "pending", "ready")]
+
+    asyncio.run(record_status_changes(db, changes))
+
+    assert len(db.daily_stats.bulk_writes) == 1
+    updates = {request._filter["_id"]: request._doc for request in db.daily_stats.bulk_writes[0]}
+    assert set(updates) == {"2026-07-01", "2026-06-30", "active"}
+    assert updates["2026-07-01"]["$inc"]["status_counts.confirmed"] == 8
+    assert updates["2026-07-01"]["$inc"]["status_counts.pending"] == -9
+    assert updates["2026-07-01"]["$inc"]["revenue"] == -31.5
+    # Confirmed stays active; cancelled and ready leave the kitchen queue
+    assert updates["active"]["$inc"] == {"count": -2}
+
+
+def test_no_changes_no_write():
+    db = SimpleNamespace(daily_stats=RecordingCollection())
+    asyncio.run(record_status_changes(db, [(ORDER, "pending", "pending")]))
+    assert db.daily_stats.bulk_writes == []
@@ -0,0 +1,109 @@
+"""Batch status changes report success by their token, not by timestamps"""
+
+import asyncio
+import uuid
+from datetime import datetime
+
+from models import OrderStatus, OrderStatusBatchItem
+from services.order_status import _status_update, change_order_statuses
+
+
+def _order(order_id: str, status: str) -> dict:
+    return {
+        "id": order_id, "order_number": f"TW-20240101-{order_id}", "status": status,
+        "created_at": datetime(2024, 1, 1, 11), "pickup_time": datetime(2024, 1, 1, 12),
+        "customer": {"name": "Hans Müller", "phone": "+41 79 123 45 67"},
+        "items": [{"menu_item_id": "pad-thai", "name": "Pad Thai", "price": 18.5, "quantity": 1}],
+        "total": 18.5,
+    }
+
+
+def _apply(order: dict, pipeline: list):
+    """Evaluate the pipeline update from _status_update on one document"""
+    stage = pipeline[0]["$set"]
+    change = dict(stage["status_changes"]["$slice"][0]["$concatArrays"][1][0], **{"from": order["status"]})
+    order["previous_status"] = order["status"]
+    order["status"] = stage["status"]
+    order["updated_at"] = stage["updated_at"]
+    order["status_changes"] = (order.get("status_changes", []) + [change])[-10:]
+
+
+class Orders:
+    def __init__(self, orders, after_batch=None):
+        self.orders = {order["id"]: order for order in orders}
+        self.after_batch = after_batch
+
+    async def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            query = request._filter
+            order = self.orders.get(query["id"])
+            if order is not None and order["status"] in query["status"]["$in"]:
+                _apply(order, request._doc)
+        if self.after_batch:
+            self.after_batch(self.orders)
+
+    def find(self, query):
+        return self._iterate([self.orders[i] for i in query["id"]["$in"] if i in self.orders])
+
+    async def _iterate(self, docs):
+        for doc in docs:
+            yield dict(doc)
+
+
+class DailyStats:
+    def __init__(self):
+        self.requests = []
+
+    async def bulk_write(self, requests, ordered=True):
+        self.requests.extend(requests)
+
+
+class Database:
+    def __init__(self, orders):
+        self.orders = orders
+        self.daily_stats = DailyStats()
+
+
+def test_batch_results_follow_the_token():
+    def another_screen(orders):
+        # Someone moves order 3 on within the same second, before the read-back
+        _apply(orders["3"], _status_update(OrderStatus.PREPARING, datetime.utcnow(), str(uuid.uuid4())))
+
+    db = Database(Orders(
+        [_order("1", "pending"), _order("2", "completed"), _order("3", "pending")],
+        after_batch=another_screen
+    ))
+    updates = [
+        OrderStatusBatchItem(order_id="1", status=OrderStatus.CONFIRMED),
+        OrderStatusBatchItem(order_id="2", status=OrderStatus.CONFIRMED),
+        OrderStatusBatchItem(order_id="3", status=OrderStatus.CONFIRMED),
+        OrderStatusBatchItem(order_id="4", status=OrderStatus.CONFIRMED),
+    ]
+
+    results = {result["order_id"]: result for result in asyncio.run(change_order_statuses(db, updates))}
+
+    assert results["1"]["success"] is True
+    assert results["2"]["success"] is False
+    assert "completed" in results["2"]["error"]
+    # Applied by this batch even though the order has since moved on
+    assert results["3"]["success"] is True
+    assert results["3"]["order"]["status"] == "preparing"
+    assert results["4"] == {
+        "order_id": "4", "status": OrderStatus.CONFIRMED, "success": False, "error": "Order not found"
+    }
+
+    # The rollups record exactly the two changes this batch made
+    day, = [request._doc["$inc"] for request in db.daily_stats.requests if request._filter["_id"] != "active"]
+    assert day == {"status_counts.pending": -2, "status_counts.confirmed": 2}
+
+
+def test_change_by_an_earlier_batch_is_not_mistaken_for_this_one():
+    order = _order("1", "pending")
+    # A previous batch already confirmed it
+    _apply(order, _status_update(OrderStatus.CONFIRMED, datetime.utcnow(), str(uuid.uuid4())))
+    db = Database(Orders([order]))
+
+    result, = asyncio.run(change_order_statuses(db, [OrderStatusBatchItem(order_id="1", status=OrderStatus.CONFIRMED)]))
+
+    assert result["success"] is False
+    assert db.daily_stats.requests == []
@@ -0,0 +1,91 @@
+"""SMTPConnectionPool against a real SMTP server: connections are reused and replaced when dropped"""
+
+import asyncio
+import socket
+from email.message import EmailMessage
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from services.smtp_pool import SMTPConnectionPool
+
+
+class RecordingHandler:
+    """Keeps every received message with the client address it came in on"""
+
+    def __init__(self):
+        self.received = []
+        self.sessions = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received.append((session.peer, envelope.content))
+        self.sessions.append(server)
+        return "250 Message accepted for delivery"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _message(subject: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "kueche@tantawan.ch"
+    message["To"] = "info@tantawan.ch"
+    message["Subject"] = subject
+    message.set_content(f"Bestellung {subject}")
+    return message
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+def _pool(controller) -> SMTPConnectionPool:
+    return SMTPConnectionPool(controller.hostname, controller.port, size=1, starttls=False)
+
+
+def test_messages_share_one_connection(smtp_server):
+    controller, handler = smtp_server
+
+    async def send_two():
+        pool = _pool(controller)
+        try:
+            await pool.send(_message("TW-1"))
+            await pool.send(_message("TW-2"))
+        finally:
+            await pool.close()
+
+    asyncio.run(send_two())
+
+    assert len(handler.received) == 2
+    (first_peer, _), (second_peer, _) = handler.received
+    assert first_peer == second_peer
+
+
+def test_reconnects_after_server_drops_connection(smtp_server):
+    controller, handler = smtp_server
+
+    async def send_across_drop():
+        pool = _pool(controller)
+        try:
+            await pool.send(_message("TW-1"))
+            # The server hangs up on the pooled connection between two messages
+            controller.loop.call_soon_threadsafe(handler.sessions[0].transport.close)
+            await asyncio.sleep(0.1)
+            await pool.send(_message("TW-2"))
+        finally:
+            await pool.close()
+
+    asyncio.run(send_across_drop())
+
+    assert len(handler.received) == 2
+    (first_peer, _), (second_peer, _) = handler.received
+    assert first_peer != second_peer
+    assert b"TW-2" in handler.received[1][1]
@@ -0,0 +1,70 @@
+"""The SQL kitchen views must cost a fixed number of statements, however many orders there are"""
+
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+
+DB_FILE = Path(tempfile.mkdtemp()) / "admin_views.db"
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_FILE}"
+
+import server_sql_working as server  # noqa: E402
+
+
+async def _seed(order_count: int):
+    async with server.engine.begin() as conn:
+        await conn.run_sync(server.Base.metadata.drop_all)
+        await conn.run_sync(server.Base.metadata.create_all)
+
+    now = datetime.now()
+    async with server.SessionLocal() as db:
+        for n in range(order_count):
+            order = server.OrderDB(
+                order_number=f"TW-TEST-{n:04d}",
+                customer_name=f"Kunde {n}",
+                customer_phone="0791234567",
+                pickup_time=now + timedelta(hours=1),
+                total=25.0,
+                status="pending",
+                created_at=now - timedelta(minutes=n),
+            )
+            order.items = [
+                server.OrderItemDB(menu_item_id="pad-thai", name="Pad Thai", price=18.5, quantity=1),
+                server.OrderItemDB(menu_item_id="spring-rolls", name="Frühlingsrollen", price=6.5, quantity=1),
+            ]
+            db.add(order)
+        await db.commit()
+
+
+async def _count_statements(view):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(server.engine.sync_engine, "before_cursor_execute", count)
+    try:
+        async with server.SessionLocal() as db:
+            orders = await view(db)
+    finally:
+        event.remove(server.engine.sync_engine, "before_cursor_execute", count)
+    return orders, statements
+
+
+@pytest.mark.parametrize("order_count", [1, 50])
+@pytest.mark.parametrize("view", ["get_pending_orders", "get_todays_orders"])
+def test_admin_view_uses_two_statements(view, order_count):
+    async def run():
+        await _seed(order_count)
+        return await _count_statements(getattr(server, view))
+
+    orders, statements = asyncio.run(run())
+
+    assert len(orders) == order_count
+    assert all(len(order["items"]) == 2 for order in orders)
+    # One for the orders, one IN query for all of their items
+    assert len(statements) == 2, statements